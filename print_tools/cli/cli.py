@@ -1,4 +1,9 @@
+import cProfile
+import pstats
+
 import rich_click as click
+
+from ..utils.metrics import reset_metrics
 from .imposition import cli as imposition
 from .templating import cli as templating
 from .concat import cli as concat
@@ -6,9 +11,40 @@ from .split import cli as split
 
 
 @click.group()
-def cli():
+@click.option(
+    "--metrics",
+    "metrics_format",
+    type=click.Choice(["text", "json"], case_sensitive=False),
+    default=None,
+    help="Report per-phase timings and counters on stderr when done",
+)
+@click.option(
+    "--profile",
+    is_flag=True,
+    default=False,
+    help="Profile the run and print the most expensive functions on stderr",
+)
+@click.pass_context
+def cli(ctx: click.Context, metrics_format: str | None, profile: bool):
     """Print Tools CLI for generating and manipulating PDF documents."""
-    pass
+    metrics = reset_metrics()
+
+    profiler = cProfile.Profile() if profile else None
+    if profiler:
+        profiler.enable()
+
+    def report():
+        if profiler:
+            profiler.disable()
+            stats = pstats.Stats(profiler, stream=click.get_text_stream("stderr"))
+            stats.sort_stats("cumulative").print_stats(25)
+
+        if metrics_format == "json":
+            click.echo(metrics.to_json(), err=True)
+        elif metrics_format == "text":
+            click.echo(metrics.to_text(), err=True)
+
+    ctx.call_on_close(report)
 
 
 cli.add_command(imposition)
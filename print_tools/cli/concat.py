@@ -13,6 +13,31 @@ from ..core.concat import concat_pdfs
     default=Path("output.pdf"),
     help="Output file path for the concatenated PDF",
 )
-def cli(input_files: list[Path], output_file: Path):
+@click.option(
+    "--streaming",
+    is_flag=True,
+    default=False,
+    help="Write pages while reading the inputs, copying stream data verbatim",
+)
+@click.option(
+    "--dedupe",
+    is_flag=True,
+    default=False,
+    help="Store identical fonts, images and other resources only once",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=int,
+    default=1,
+    help="Number of worker processes parsing inputs in parallel (implies --streaming)",
+)
+def cli(
+    input_files: list[Path],
+    output_file: Path,
+    streaming: bool,
+    dedupe: bool,
+    jobs: int,
+):
     """Concatenate multiple PDF files into a single PDF."""
-    concat_pdfs(input_files, output_file)
+    concat_pdfs(input_files, output_file, streaming=streaming, dedupe=dedupe, jobs=jobs)
@@ -1,9 +1,32 @@
+from collections import Counter
 from pathlib import Path
 import rich_click as click
 
-from ..utils import gather_pdf_pages
-from ..utils.layouting.algorithms import BookletLayouter, GridLayouter, PackLayouter
-from ..core.imposition import impose_pages_general
+from ..utils.metrics import phase, record_output
+from ..utils.pages import PageSource, gather_page_refs
+from ..utils.selection import PageSelection
+from ..utils.layouting.algorithms import (
+    PACK_ALGORITHMS,
+    BookletLayouter,
+    GangRunLayouter,
+    GridLayouter,
+    make_pack_layouter,
+)
+from ..utils.layouting.cache import CachedLayouter, LayoutCache
+from ..utils.layouting.portfolio import PortfolioLayouter
+from ..utils.parsing import parse_duration
+from ..core.imposition import (
+    check_plan_pages,
+    impose_pages_general,
+    layout_pages,
+    load_plan,
+    make_plan,
+    render_layout,
+    render_layout_parallel,
+    render_layout_streaming,
+    save_plan,
+)
+from .params import PDF_INPUT
 
 
 @click.group(name="imposition")
@@ -12,24 +35,85 @@ def cli():
     pass
 
 
-def _impose_impl(input_files: list[Path], output_file: Path, layouter, paper: str):
-    pages = gather_pdf_pages(input_files)
+def _duration(ctx, param, value: str) -> float:
+    try:
+        return parse_duration(value)
+    except ValueError:
+        raise click.BadParameter(f"{value!r} is not a duration like 5s or 500ms")
+
+
+def _pack_layouter(
+    algorithm: str,
+    padding: int,
+    gap: int,
+    bin_selection: str | None,
+    time_budget: float,
+    jobs: int,
+):
+    if algorithm == "portfolio":
+        return PortfolioLayouter(
+            padding=padding, gap=gap, time_budget=time_budget, jobs=jobs
+        )
+    return make_pack_layouter(
+        algorithm, padding=padding, gap=gap, bin_selection=bin_selection
+    )
+
+
+def _impose_impl(
+    input_files: list[Path | PageSelection],
+    output_file: Path,
+    layouter,
+    paper: str,
+    engine: str = "xobject",
+    jobs: int = 1,
+    copies: int | None = None,
+    chunk_sheets: int | None = None,
+):
+    source = PageSource()
+    with phase("parse"):
+        pages = gather_page_refs(input_files, source=source, jobs=jobs)
 
     if not pages:
         raise ValueError("No PDF pages found in the provided input files.")
 
-    print(f"Imposing {len(pages)} PDF pages into a layout...")
+    quantities = None
+    if copies is not None:
+        # every page once, with repeated inputs adding to its copies
+        counts = Counter(pages)
+        pages = list(counts)
+        quantities = [counts[page] * copies for page in pages]
 
-    writer = impose_pages_general(pages, layouter, paper=paper)
+    if jobs > 1:
+        result = layout_pages(pages, layouter, paper=paper, quantities=quantities)
+        render_layout_parallel(result, pages, output_file, engine=engine, jobs=jobs)
+    elif chunk_sheets:
+        result = layout_pages(pages, layouter, paper=paper, quantities=quantities)
+        render_layout_streaming(
+            result,
+            pages,
+            output_file,
+            chunk_sheets=chunk_sheets,
+            engine=engine,
+            source=source,
+        )
+    else:
+        writer = impose_pages_general(
+            pages,
+            layouter,
+            paper=paper,
+            engine=engine,
+            source=source,
+            quantities=quantities,
+        )
 
-    with output_file.open("wb") as f:
-        writer.write(f)
+        with phase("write"), output_file.open("wb") as f:
+            writer.write(f)
 
-    print(f"Imposed PDF saved to {output_file}")
+    record_output(output_file)
 
 
 @cli.command(name="grid")
-@click.argument("input_files", nargs=-1, type=click.Path(exists=True, path_type=Path))
+@click.argument("input_files", nargs=-1, type=PDF_INPUT)
 @click.option(
     "-o",
     "--output-file",
@@ -59,18 +143,37 @@ def _impose_impl(input_files: list[Path], output_file: Path, layouter, paper: st
     default=0,
     help="Gap between PDF pages in the grid layout",
 )
+@click.option(
+    "--engine",
+    type=click.Choice(["xobject", "merge"], case_sensitive=False),
+    default="xobject",
+    help="Embed each page once as a shared Form XObject, or merge its content per placement",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=int,
+    default=1,
+    help="Number of worker processes scanning inputs and rendering sheets in parallel",
+)
 def impose_grid(
-    input_files: list[Path], output_file: Path, paper: str, padding: int, gap: int
+    input_files: list[Path | PageSelection],
+    output_file: Path,
+    paper: str,
+    padding: int,
+    gap: int,
+    engine: str,
+    jobs: int,
 ):
     """Impose multiple PDF files into a grid layout on a single PDF."""
 
     layouter = GridLayouter(padding=padding, gap=gap)
 
-    _impose_impl(input_files, output_file, layouter, paper)
+    _impose_impl(input_files, output_file, layouter, paper, engine, jobs)
 
 
 @cli.command(name="pack")
-@click.argument("input_files", nargs=-1, type=click.Path(exists=True, path_type=Path))
+@click.argument("input_files", nargs=-1, type=PDF_INPUT)
 @click.option(
     "-o",
     "--output-file",
@@ -100,18 +203,139 @@ def impose_grid(
     default=0,
     help="Gap between PDF pages in the grid layout",
 )
+@click.option(
+    "-a",
+    "--algorithm",
+    type=click.Choice([*PACK_ALGORITHMS, "portfolio"], case_sensitive=False),
+    default="bottom-left",
+    help="Packing algorithm (and heuristic) used to place the pages; portfolio tries them all",
+)
+@click.option(
+    "--bin-selection",
+    type=click.Choice(["first-fit", "best-fit"], case_sensitive=False),
+    default=None,
+    help="Which open sheet each page goes into: the first it fits on, or the fullest (not for bottom-left)",
+)
+@click.option(
+    "--layout-cache",
+    type=click.Path(file_okay=False, path_type=Path),
+    default=None,
+    help="Directory to cache layouts in, so repeat jobs with the same page sizes skip the packing",
+)
+@click.option(
+    "--time-budget",
+    type=str,
+    default="5s",
+    callback=_duration,
+    help="How long the portfolio algorithm may search for fewer sheets (e.g. 5s, 500ms)",
+)
+@click.option(
+    "--engine",
+    type=click.Choice(["xobject", "merge"], case_sensitive=False),
+    default="xobject",
+    help="Embed each page once as a shared Form XObject, or merge its content per placement",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=int,
+    default=1,
+    help="Number of worker processes scanning inputs and rendering sheets in parallel",
+)
 def impose_pack(
-    input_files: list[Path], output_file: Path, paper: str, padding: int, gap: int
+    input_files: list[Path | PageSelection],
+    output_file: Path,
+    paper: str,
+    padding: int,
+    gap: int,
+    algorithm: str,
+    bin_selection: str | None,
+    layout_cache: Path | None,
+    time_budget: float,
+    engine: str,
+    jobs: int,
 ):
     """Impose multiple PDF files into a packed layout on a single PDF."""
 
-    layouter = PackLayouter(padding=padding, gap=gap)
+    layouter = _pack_layouter(
+        algorithm.lower(), padding, gap, bin_selection, time_budget, jobs
+    )
+    if layout_cache:
+        layouter = CachedLayouter(layouter, LayoutCache(layout_cache))
+
+    _impose_impl(input_files, output_file, layouter, paper, engine, jobs)
+
+
+@cli.command(name="gang")
+@click.argument("input_files", nargs=-1, type=PDF_INPUT)
+@click.option(
+    "-o",
+    "--output-file",
+    type=click.Path(path_type=Path),
+    default=Path("output.pdf"),
+    help="Output file path for the imposed PDF",
+)
+@click.option(
+    "-p",
+    "--paper",
+    type=click.Choice(
+        ["A3", "A3-landscape", "A4", "A4-landscape", "A5", "A5-landscape"],
+        case_sensitive=False,
+    ),
+    default="A4",
+    help="Paper size for the imposed document",
+)
+@click.option(
+    "--padding",
+    type=int,
+    default=0,
+    help="Padding around each PDF page in the grid layout",
+)
+@click.option(
+    "--gap",
+    type=int,
+    default=0,
+    help="Gap between PDF pages in the grid layout",
+)
+@click.option(
+    "-c",
+    "--copies",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Copies of every page; repeating an input file adds that many more",
+)
+@click.option(
+    "--engine",
+    type=click.Choice(["xobject", "merge"], case_sensitive=False),
+    default="xobject",
+    help="Embed each page once as a shared Form XObject, or merge its content per placement",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=int,
+    default=1,
+    help="Number of worker processes scanning inputs and rendering sheets in parallel",
+)
+def impose_gang(
+    input_files: list[Path | PageSelection],
+    output_file: Path,
+    paper: str,
+    padding: int,
+    gap: int,
+    copies: int,
+    engine: str,
+    jobs: int,
+):
+    """Gang-run copies of PDF pages onto as few sheets as possible."""
+
+    layouter = GangRunLayouter(padding=padding, gap=gap)
 
-    _impose_impl(input_files, output_file, layouter, paper)
+    _impose_impl(input_files, output_file, layouter, paper, engine, jobs, copies)
 
 
 @cli.command(name="booklet")
-@click.argument("input_files", nargs=-1, type=click.Path(exists=True, path_type=Path))
+@click.argument("input_files", nargs=-1, type=PDF_INPUT)
 @click.option(
     "-o",
     "--output-file",
@@ -141,11 +365,228 @@ def impose_pack(
     default=0,
     help="Gap between PDF pages in the grid layout",
 )
+@click.option(
+    "-s",
+    "--signature-pages",
+    type=click.IntRange(min=0),
+    default=0,
+    help="Pages per signature (a multiple of 4), imposed and written one at a time so long books render in constant memory; 0 = one signature",
+)
+@click.option(
+    "--engine",
+    type=click.Choice(["xobject", "merge"], case_sensitive=False),
+    default="xobject",
+    help="Embed each page once as a shared Form XObject, or merge its content per placement",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=int,
+    default=1,
+    help="Number of worker processes scanning inputs and rendering sheets in parallel",
+)
 def impose_booklet(
-    input_files: list[Path], output_file: Path, paper: str, padding: int, gap: int
+    input_files: list[Path | PageSelection],
+    output_file: Path,
+    paper: str,
+    padding: int,
+    gap: int,
+    signature_pages: int,
+    engine: str,
+    jobs: int,
 ):
     """Impose multiple PDF files into a booklet layout on a single PDF."""
 
-    layouter = BookletLayouter(padding=padding, gap=gap)
+    if signature_pages % 4:
+        raise click.BadParameter(
+            "must be a multiple of 4", param_hint="--signature-pages"
+        )
+
+    layouter = BookletLayouter(
+        padding=padding, gap=gap, signature_pages=signature_pages
+    )
+
+    _impose_impl(
+        input_files,
+        output_file,
+        layouter,
+        paper,
+        engine,
+        jobs,
+        # two pages per sheet side, one side per sheet in the output
+        chunk_sheets=signature_pages // 2,
+    )
+
+
+@cli.command(name="plan")
+@click.argument("input_files", nargs=-1, type=PDF_INPUT)
+@click.option(
+    "-o",
+    "--output-file",
+    type=click.Path(path_type=Path),
+    default=Path("plan.json"),
+    help="Output file path for the plan (.json, or .json.gz for gzip)",
+)
+@click.option(
+    "-l",
+    "--layout",
+    type=click.Choice(["grid", "pack", "booklet"], case_sensitive=False),
+    default="grid",
+    help="Layout algorithm to plan with",
+)
+@click.option(
+    "-p",
+    "--paper",
+    type=click.Choice(
+        ["A3", "A3-landscape", "A4", "A4-landscape", "A5", "A5-landscape"],
+        case_sensitive=False,
+    ),
+    default="A4",
+    help="Paper size for the imposed document",
+)
+@click.option(
+    "--padding",
+    type=int,
+    default=0,
+    help="Padding around each PDF page in the grid layout",
+)
+@click.option(
+    "--gap",
+    type=int,
+    default=0,
+    help="Gap between PDF pages in the grid layout",
+)
+@click.option(
+    "-a",
+    "--algorithm",
+    type=click.Choice([*PACK_ALGORITHMS, "portfolio"], case_sensitive=False),
+    default="bottom-left",
+    help="Packing algorithm (and heuristic) used with --layout pack; portfolio tries them all",
+)
+@click.option(
+    "--bin-selection",
+    type=click.Choice(["first-fit", "best-fit"], case_sensitive=False),
+    default=None,
+    help="Which open sheet each page goes into: the first it fits on, or the fullest (not for bottom-left)",
+)
+@click.option(
+    "--layout-cache",
+    type=click.Path(file_okay=False, path_type=Path),
+    default=None,
+    help="Directory to cache layouts in, so repeat jobs with the same page sizes skip the packing",
+)
+@click.option(
+    "--time-budget",
+    type=str,
+    default="5s",
+    callback=_duration,
+    help="How long the portfolio algorithm may search for fewer sheets (e.g. 5s, 500ms)",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=int,
+    default=1,
+    help="Number of worker processes scanning inputs and searching layouts in parallel",
+)
+def plan(
+    input_files: list[Path | PageSelection],
+    output_file: Path,
+    layout: str,
+    paper: str,
+    padding: int,
+    gap: int,
+    algorithm: str,
+    bin_selection: str | None,
+    layout_cache: Path | None,
+    time_budget: float,
+    jobs: int,
+):
+    """Compute and save an imposition layout without rendering it."""
+
+    if layout.lower() == "pack":
+        layouter = _pack_layouter(
+            algorithm.lower(), padding, gap, bin_selection, time_budget, jobs
+        )
+    else:
+        layouter = {
+            "grid": GridLayouter,
+            "booklet": BookletLayouter,
+        }[layout.lower()](padding=padding, gap=gap)
+
+    if layout_cache:
+        layouter = CachedLayouter(layouter, LayoutCache(layout_cache))
+
+    with phase("parse"):
+        pages = gather_page_refs(input_files, jobs=jobs)
+
+    if not pages:
+        raise ValueError("No PDF pages found in the provided input files.")
+
+    imposition_plan = make_plan(pages, layouter, paper=paper)
+
+    with phase("write"):
+        save_plan(imposition_plan, output_file)
+
+    record_output(output_file)
+
+
+@cli.command(name="apply")
+@click.argument("plan_file", type=click.Path(exists=True, path_type=Path))
+@click.argument("input_files", nargs=-1, type=PDF_INPUT)
+@click.option(
+    "-o",
+    "--output-file",
+    type=click.Path(path_type=Path),
+    default=Path("output.pdf"),
+    help="Output file path for the imposed PDF",
+)
+@click.option(
+    "--engine",
+    type=click.Choice(["xobject", "merge"], case_sensitive=False),
+    default="xobject",
+    help="Embed each page once as a shared Form XObject, or merge its content per placement",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=int,
+    default=1,
+    help="Number of worker processes rendering sheets in parallel",
+)
+def apply(
+    plan_file: Path,
+    input_files: list[Path | PageSelection],
+    output_file: Path,
+    engine: str,
+    jobs: int,
+):
+    """
+    Render a saved plan.
+
+    PLAN_FILE: Plan written by the plan command
+    INPUT_FILES: Inputs to render (default: the files the plan was made from)
+    """
+    source = PageSource()
+    with phase("parse"):
+        imposition_plan = load_plan(plan_file)
+
+        if input_files:
+            pages = gather_page_refs(input_files, source=source)
+            check_plan_pages(imposition_plan, pages)
+        else:
+            pages = imposition_plan.pages
+
+    if jobs > 1:
+        render_layout_parallel(
+            imposition_plan.layout, pages, output_file, engine=engine, jobs=jobs
+        )
+    else:
+        writer = render_layout(
+            imposition_plan.layout, pages, engine=engine, source=source
+        )
+
+        with phase("write"), output_file.open("wb") as f:
+            writer.write(f)
 
-    _impose_impl(input_files, output_file, layouter, paper)
+    record_output(output_file)
@@ -0,0 +1,30 @@
+import rich_click as click
+from pathlib import Path
+
+from ..utils.selection import PageSelection, input_path, parse_page_input
+
+
+class PdfInput(click.ParamType):
+    """
+    An existing file or directory, or a PDF file with page ranges in brackets
+    (`book.pdf[100-140]`), converted to a `Path` or a `PageSelection`.
+    """
+
+    name = "path"
+
+    def convert(self, value, param, ctx) -> Path | PageSelection:
+        if isinstance(value, (Path, PageSelection)):
+            return value
+
+        try:
+            pdf = parse_page_input(value)
+        except ValueError as e:
+            self.fail(str(e), param, ctx)
+
+        if not input_path(pdf).exists():
+            self.fail(f"Path '{input_path(pdf)}' does not exist.", param, ctx)
+
+        return pdf
+
+
+PDF_INPUT = PdfInput()
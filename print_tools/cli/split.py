@@ -2,13 +2,16 @@ import rich_click as click
 from pathlib import Path
 
 
+from ..utils.metrics import phase, record_output
 from ..utils.paper import get_paper_size
-from ..utils.utils import gather_pdf_pages
-from ..core.split import split_pdf_pages_by_size
+from ..utils.selection import PageSelection
+from ..utils.utils import gather_files, gather_pdf_pages
+from ..core.split import split_pdf_files_passthrough, split_pdf_pages_by_size
+from .params import PDF_INPUT
 
 
 @click.command(name="split")
-@click.argument("input_files", nargs=-1, type=click.Path(exists=True, path_type=Path))
+@click.argument("input_files", nargs=-1, type=PDF_INPUT)
 @click.option(
     "-o",
     "--output-file",
@@ -26,13 +29,46 @@ from ..core.split import split_pdf_pages_by_size
     default="A4",
     help="Target paper size for splitting the PDF",
 )
-def cli(input_files: list[Path], output_file: Path, target_paper: str):
+@click.option(
+    "--passthrough",
+    is_flag=True,
+    default=False,
+    help="Copy page content verbatim and write tiles while reading the inputs",
+)
+@click.option(
+    "--engine",
+    type=click.Choice(["mediabox", "xobject"], case_sensitive=False),
+    default="mediabox",
+    help="Give each tile the page with a moved mediabox, or draw the page once wrapped as a shared Form XObject (not with --passthrough)",
+)
+def cli(
+    input_files: list[Path | PageSelection],
+    output_file: Path,
+    target_paper: str,
+    passthrough: bool,
+    engine: str,
+):
     """Split PDF pages into multiple smaller pages."""
 
-    pages = gather_pdf_pages(input_files)
-
     target_size_pt = get_paper_size(target_paper)
 
-    writer = split_pdf_pages_by_size(pages, target_size_pt=target_size_pt)
+    if passthrough:
+        with phase("write"):
+            split_pdf_files_passthrough(
+                gather_files(input_files), output_file, target_size_pt=target_size_pt
+            )
+        record_output(output_file)
+        return
+
+    with phase("parse"):
+        pages = gather_pdf_pages(input_files)
+
+    with phase("split"):
+        writer = split_pdf_pages_by_size(
+            pages, target_size_pt=target_size_pt, engine=engine.lower()
+        )
+
+    with phase("write"):
+        writer.write(output_file)
 
-    writer.write(output_file)
+    record_output(output_file)
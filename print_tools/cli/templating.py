@@ -2,7 +2,12 @@ from pathlib import Path
 
 import rich_click as click
 
-from ..core.templating import create_labeled_pdfs
+from ..core.templating import (
+    SlotFormatError,
+    TextSlot,
+    create_labeled_pdfs,
+    fill_records,
+)
 
 
 @click.group(name="templating")
@@ -11,6 +16,13 @@ def cli():
     pass
 
 
+def _slots(ctx, param, values: tuple[str, ...]) -> list[TextSlot]:
+    try:
+        return [TextSlot.parse(value) for value in values]
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+
 @cli.command(name="overlay")
 @click.argument("template", type=click.Path(exists=True, path_type=Path))
 @click.argument("blocks", type=click.Path(exists=True, path_type=Path))
@@ -30,11 +42,39 @@ def cli():
     default=4,
     help="Extra space between lines in points",
 )
+@click.option(
+    "--fit",
+    "fit_margin",
+    type=click.FloatRange(min=0),
+    default=None,
+    metavar="MARGIN",
+    help="Shrink each block from --size until it fits the page less MARGIN points on every side",
+)
+@click.option(
+    "--min-size",
+    type=click.FloatRange(min=0, min_open=True),
+    default=4.0,
+    help="Smallest size text is shrunk to by --fit",
+)
 @click.option(
     "--colour",
     default="#000000",
     help="Text color: reportlab color name or #RRGGBB hex code",
 )
+@click.option(
+    "-n",
+    "--blocks-per-file",
+    type=click.IntRange(min=0),
+    default=1,
+    help="Blocks (pages) per output file; 0 writes all blocks into a single blocks.pdf",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=int,
+    default=1,
+    help="Number of worker processes rendering blocks in parallel",
+)
 def overlay_text(
     template: Path,
     blocks: Path,
@@ -42,7 +82,11 @@ def overlay_text(
     font: str,
     size: int,
     spacing: int,
+    fit_margin: float | None,
+    min_size: float,
     colour: str,
+    blocks_per_file: int,
+    jobs: int,
 ):
     """
     Overlay blocks of text on a PDF template.
@@ -59,4 +103,98 @@ def overlay_text(
         font_size=size,
         line_spacing=spacing,
         text_colour=colour,
+        blocks_per_file=blocks_per_file,
+        jobs=jobs,
+        fit_margin=fit_margin,
+        min_font_size=min_size,
     )
+
+
+@cli.command(name="fill")
+@click.argument("template", type=click.Path(exists=True, path_type=Path))
+@click.argument("records", type=click.Path(exists=True, path_type=Path))
+@click.argument("output_dir", type=click.Path(path_type=Path))
+@click.option(
+    "-s",
+    "--slot",
+    "slots",
+    multiple=True,
+    required=True,
+    callback=_slots,
+    help="Text to draw for each record, as X,Y[,left|centre|right][,WIDTH]=TEXT in points from the lower left, with {field} placeholders (format specs like {price:.2f} need numbers, which CSV fields never are); text wider than WIDTH is shrunk to fit; repeatable",
+)
+@click.option(
+    "--font",
+    default="Helvetica",
+    help="Font name or path to TTF/OTF file",
+)
+@click.option(
+    "--size",
+    default=12,
+    help="Font size in points; the largest size for slots with a width",
+)
+@click.option(
+    "--min-size",
+    type=click.FloatRange(min=0, min_open=True),
+    default=4.0,
+    help="Smallest size text is shrunk to in slots with a width",
+)
+@click.option(
+    "--colour",
+    default="#000000",
+    help="Text color: reportlab color name or #RRGGBB hex code",
+)
+@click.option(
+    "-n",
+    "--records-per-file",
+    type=click.IntRange(min=0),
+    default=1,
+    help=(
+        "Records (pages) per output file; 0 writes all records into a single "
+        "records.pdf (whose memory use grows slowly with the number of records)"
+    ),
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=int,
+    default=1,
+    help="Number of worker processes rendering records in parallel",
+)
+def fill(
+    template: Path,
+    records: Path,
+    output_dir: Path,
+    slots: list[TextSlot],
+    font: str,
+    size: int,
+    min_size: float,
+    colour: str,
+    records_per_file: int,
+    jobs: int,
+):
+    """
+    Fill text slots on a PDF template from CSV or JSON Lines records.
+
+    TEMPLATE: Path to the PDF template file
+    RECORDS: Path to a .csv file with a header row, or a .jsonl file
+    OUTPUT_DIR: Directory to save the generated PDFs
+    """
+    if records.suffix.lower() not in (".csv", ".jsonl", ".ndjson"):
+        raise click.BadParameter("must be a .csv or .jsonl file", param_hint="RECORDS")
+
+    try:
+        fill_records(
+            template_path=template,
+            records_path=records,
+            output_dir=output_dir,
+            slots=slots,
+            font_name=font,
+            font_size=size,
+            text_colour=colour,
+            records_per_file=records_per_file,
+            jobs=jobs,
+            min_font_size=min_size,
+        )
+    except SlotFormatError as e:
+        raise click.BadParameter(str(e), param_hint="--slot")
@@ -1,30 +1,174 @@
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from pypdf import PdfWriter
+from pypdf import PdfReader, PdfWriter
 
 from ..utils import gather_files
+from ..utils.metrics import count, phase, record_output
+from ..utils.pdfstream import (
+    PAGES_NUM,
+    StreamingPart,
+    StreamingPdfWriter,
+    object_budget,
+)
 
 
-def concat_pdfs(input_files: list[Path], output_file: Path):
-    """Concatenate multiple PDF files into a single PDF."""
+def _object_budget(path: Path) -> int:
+    with path.open("rb") as fh:
+        return object_budget(PdfReader(fh))
+
+
+def _write_part(
+    path: Path, part_path: Path, first_number: int, budget: int
+) -> StreamingPart:
+    """Copy the pages of `path` into `part_path`, numbering from `first_number`."""
+    with part_path.open("wb") as fh:
+        writer = StreamingPdfWriter(fh, first_number=first_number, header=False)
+        writer.append(path)
+        part = writer.part()
+
+    if part.next_number > first_number + budget:
+        raise RuntimeError(f"{path} needed more object numbers than its xref declares")
+
+    return part
+
+
+def _write_deduplicated(path: Path, part_path: Path) -> Path:
+    """Copy the pages of `path` into the PDF `part_path`, deduplicated."""
+    with part_path.open("wb") as fh, StreamingPdfWriter(fh, dedupe=True) as writer:
+        writer.append(path)
+    return part_path
+
+
+def _concat_parallel(
+    input_files: list[Path], output_file: Path, jobs: int, dedupe: bool
+) -> None:
+    """
+    Parse and copy the inputs in `jobs` worker processes, then stitch the
+    parts together in input order.
+
+    Each input gets a disjoint range of object numbers sized by its xref, so
+    the workers never need to talk to each other. Unused numbers end up as free
+    xref entries.
+
+    With `dedupe`, the workers write each input as a PDF of its own instead,
+    and the parts are copied into the output by a deduplicating writer, so
+    objects are shared across inputs as well.
+    """
+    if dedupe:
+        with (
+            tempfile.TemporaryDirectory() as tmp,
+            ProcessPoolExecutor(max_workers=jobs) as pool,
+        ):
+            part_paths = [
+                Path(tmp) / f"part_{i:05d}.pdf" for i in range(len(input_files))
+            ]
+            parts = pool.map(_write_deduplicated, input_files, part_paths)
+
+            with (
+                output_file.open("wb") as f,
+                StreamingPdfWriter(f, dedupe=True) as writer,
+            ):
+                for part_path in parts:
+                    writer.append(part_path)
+                    part_path.unlink()
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        budgets = list(pool.map(_object_budget, input_files))
+
+        first_numbers = []
+        next_number = PAGES_NUM + 1
+        for budget in budgets:
+            first_numbers.append(next_number)
+            next_number += budget
+
+        with tempfile.TemporaryDirectory() as tmp:
+            part_paths = [Path(tmp) / f"part_{i:05d}" for i in range(len(input_files))]
+
+            parts = pool.map(
+                _write_part,
+                input_files,
+                part_paths,
+                first_numbers,
+                budgets,
+            )
+
+            with output_file.open("wb") as f, StreamingPdfWriter(f) as writer:
+                for part, part_path in zip(parts, part_paths):
+                    with part_path.open("rb") as data:
+                        writer.append_part(part, data)
+                    part_path.unlink()
+
+
+def concat_pdfs(
+    input_files: list[Path],
+    output_file: Path,
+    streaming: bool = False,
+    dedupe: bool = False,
+    jobs: int = 1,
+):
+    """
+    Concatenate multiple PDF files into a single PDF.
+
+    With `streaming`, pages are written to `output_file` while the inputs are
+    read, which keeps memory bounded by the largest page instead of the
+    combined size of all inputs. Outlines and other document-level data of the
+    inputs are dropped in that mode.
+
+    With `dedupe`, identical objects coming from different inputs (fonts, ICC
+    profiles, images, ...) are stored once and shared.
+
+    With `jobs` > 1, the inputs are parsed in that many worker processes and
+    merged in their original order. This implies `streaming`.
+    """
     input_files = gather_files(input_files)
 
     if not input_files:
         raise ValueError("input_files must contain at least one path")
 
-    print(f"Concatenating {len(input_files)} PDF files into one...")
+    count("files_in", len(input_files))
 
     for p in input_files:
         if not p.exists():
             raise FileNotFoundError(p)
 
+    if jobs > 1:
+        # parsing and writing are interleaved in this mode
+        with phase("write"):
+            _concat_parallel(input_files, output_file, jobs=jobs, dedupe=dedupe)
+
+        record_output(output_file)
+        return output_file
+
+    if streaming:
+        with (
+            phase("write"),
+            output_file.open("wb") as f,
+            StreamingPdfWriter(f, dedupe=dedupe) as writer,
+        ):
+            for pdf in input_files:
+                writer.append(pdf)
+
+        record_output(output_file)
+        return output_file
+
     merger = PdfWriter()  # or PdfFileMerger()
 
-    for pdf in input_files:
-        merger.append(str(pdf))  # copies all pages in order
+    with phase("parse"):
+        for pdf in input_files:
+            merger.append(str(pdf))  # copies all pages in order
+
+    if dedupe:
+        with phase("dedupe"):
+            merger.compress_identical_objects(
+                remove_identicals=True, remove_orphans=True
+            )
 
-    with output_file.open("wb") as f:
+    with phase("write"), output_file.open("wb") as f:
         merger.write(f)
 
     merger.close()
 
+    record_output(output_file)
     return output_file
@@ -1,59 +1,363 @@
-from pypdf import PdfWriter
+import gc
+import gzip
+import io
+import math
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Literal, Sequence, TypeAlias
+
+from pydantic import BaseModel
+from pypdf import PdfReader, PdfWriter
 from pypdf._page import PageObject
 
-from ..utils.embed import embed_page
-from ..utils.layouting.models import BaseLayouter, Box, Container, ContainerSpec
+from ..utils.embed import FormXObjectEmbedder, embed_page
+from ..utils.metrics import count, phase
+from ..utils.layouting.models import (
+    AnyLayoutResult,
+    BaseLayouter,
+    Box,
+    CompactLayoutResult,
+    Container,
+    ContainerSpec,
+    LayoutResult,
+)
+from ..utils.pages import PageRef, PageSource
 from ..utils.paper import PaperRef, get_paper_size
+from ..utils.pdfstream import StreamingPdfWriter
 
+EmbedEngine: TypeAlias = Literal["xobject", "merge"]
 
-def impose_pages_general(
-    pages: list[PageObject], layouter: BaseLayouter, paper: PaperRef
-):
+PLAN_VERSION = 1
+
+
+class ImpositionPlan(BaseModel):
+    """
+    A layout computed ahead of rendering, together with the pages it was
+    computed for. Saved plans are rendered later with `render_layout`.
+
+    `version` has no default, so that it is always written with the plan and a
+    plan of another version can never be read as the current one.
+    """
+
+    version: int
+    pages: list[PageRef]
+    layout: LayoutResult
+
+
+def _page_size(page: PageObject | PageRef) -> tuple[float, float]:
+    if isinstance(page, PageRef):
+        return page.width, page.height
+    return page.mediabox.width, page.mediabox.height
+
+
+def layout_pages(
+    pages: Sequence[PageObject | PageRef],
+    layouter: BaseLayouter,
+    paper: PaperRef,
+    max_sheets: int | None = None,
+    quantities: Sequence[int] | None = None,
+) -> AnyLayoutResult:
+    """
+    Run `layouter` on the page sizes of `pages`, without touching content.
+
+    Sheets are created as the layout needs them; `max_sheets` optionally caps
+    how many may be used. `quantities` gives the number of copies of each
+    page, for layouters that place copies (see `GangRunLayouter`).
+    """
     w_sheet, h_sheet = get_paper_size(paper)
+    quantities = quantities or [1] * len(pages)
 
-    print(w_sheet)
-
-    result = layouter.perform_layout(
-        available_containers=ContainerSpec(
-            container=Container(width=w_sheet, height=h_sheet),
-            max_amount=100,
-        ),
-        boxes=[
-            Box(width=page.mediabox.width, height=page.mediabox.height)
-            for page in pages
-        ],
-    )
+    with phase("layout"):
+        result = layouter.perform_layout(
+            available_containers=ContainerSpec(
+                container=Container(width=w_sheet, height=h_sheet),
+                max_amount=max_sheets,
+            ),
+            boxes=[
+                Box(width=width, height=height, quantity=quantity)
+                for (width, height), quantity in zip(map(_page_size, pages), quantities)
+            ],
+        )
 
-    writer = PdfWriter()
+    count("pages_in", len(pages))
+    count("sheets", len(result.used_containers))
+    count("placements", result.placement_count)
 
-    sheets = [
-        writer.add_blank_page(width=container.width, height=container.height)
-        for container in result.used_containers
-    ]
+    return result
+
+
+def render_layout(
+    result: AnyLayoutResult,
+    pages: Sequence[PageObject | PageRef],
+    engine: EmbedEngine = "xobject",
+    source: PageSource | None = None,
+) -> PdfWriter:
+    """
+    Embed `pages` onto new sheets as described by `result`.
 
-    for applied_box in result.applied_boxes:
-        page = (
-            pages[applied_box.box_index] if applied_box.box_index < len(pages) else None
+    The `xobject` engine wraps each source page once as a Form XObject and
+    draws it with `cm` + `Do` per placement. The `merge` engine copies the page
+    content into the sheet for every placement.
+
+    `PageRef`s are loaded from `source` when they are embedded.
+    """
+    source = source or PageSource()
+
+    with phase("embed"):
+        writer = PdfWriter()
+        embedder = FormXObjectEmbedder(writer) if engine == "xobject" else None
+
+        sheets = [
+            writer.add_blank_page(width=container.width, height=container.height)
+            for container in result.used_containers
+        ]
+
+        for applied_box in result.iter_placements():
+            page = (
+                pages[applied_box.box_index]
+                if applied_box.box_index < len(pages)
+                else None
+            )
+
+            if page is None:
+                continue
+
+            sheet = sheets[applied_box.container_index]
+
+            placement = {
+                "position": applied_box.position,
+                "scale": applied_box.scale,
+                "rotation": applied_box.rotation,
+                "mirror_horizontal": applied_box.mirror_horizontal,
+                "mirror_vertical": applied_box.mirror_vertical,
+            }
+
+            # Embed the page onto the sheet with the specified transformation
+            if isinstance(page, PageRef):
+                key, page = page, source.load(page)
+            else:
+                key = None
+
+            if embedder:
+                embedder.embed_page(sheet, page, key=key, **placement)
+            else:
+                embed_page(sheet, page, **placement)
+
+        if embedder:
+            embedder.flush()
+
+        return writer
+
+
+def _chunk_layouts(
+    result: AnyLayoutResult, pages: Sequence[PageRef], chunk_sheets: int
+) -> list[tuple[CompactLayoutResult, list[PageRef]]]:
+    """
+    Cut `result` into chunks of `chunk_sheets` consecutive sheets, with
+    container and box indices rebased so each chunk can be rendered on its
+    own, together with the pages that chunk needs.
+    """
+    n_sheets = len(result.used_containers)
+    chunks = [
+        (
+            CompactLayoutResult(
+                used_containers=result.used_containers[start : start + chunk_sheets],
+                custom_fields=result.custom_fields,
+            ),
+            [],
+            {},
         )
+        for start in range(0, n_sheets, chunk_sheets)
+    ]
 
-        if page is None:
+    for ab in result.iter_placements():
+        if ab.box_index >= len(pages):
             continue
-
-        print(
-            f"Embedding page {applied_box.box_index} onto sheet {applied_box.container_index} at position {applied_box.position}"
+        chunk, local_pages, local_index = chunks[ab.container_index // chunk_sheets]
+        if ab.box_index not in local_index:
+            local_index[ab.box_index] = len(local_pages)
+            local_pages.append(pages[ab.box_index])
+        chunk.append(
+            local_index[ab.box_index],
+            ab.container_index % chunk_sheets,
+            ab.position,
+            ab.scale,
+            ab.rotation,
+            ab.mirror_horizontal,
+            ab.mirror_vertical,
         )
 
-        sheet = sheets[applied_box.container_index]
-
-        # Embed the page onto the sheet with the specified transformation
-        embed_page(
-            sheet,
-            page,
-            position=applied_box.position,
-            scale=applied_box.scale,
-            rotation=applied_box.rotation,
-            mirror_horizontal=applied_box.mirror_horizontal,
-            mirror_vertical=applied_box.mirror_vertical,
+    return [(chunk, local_pages) for chunk, local_pages, _ in chunks]
+
+
+def _render_chunk(
+    result: CompactLayoutResult,
+    pages: list[PageRef],
+    engine: EmbedEngine,
+    part_path: Path,
+) -> Path:
+    source = PageSource()
+    writer = render_layout(result, pages, engine=engine, source=source)
+
+    with part_path.open("wb") as f:
+        writer.write(f)
+
+    source.release()
+    return part_path
+
+
+def render_layout_parallel(
+    result: AnyLayoutResult,
+    pages: Sequence[PageRef],
+    output_file: Path,
+    engine: EmbedEngine = "xobject",
+    jobs: int = 2,
+) -> Path:
+    """
+    Render `result` into `output_file` using `jobs` worker processes.
+
+    The sheets are cut into `jobs` contiguous chunks, each chunk is rendered
+    in its own process, and the chunk files are stitched together in sheet
+    order. Identical objects across chunks (e.g. a page embedded as a form in
+    several chunks, with its fonts and images) are stored once in the output.
+    """
+    with phase("render"):
+        n_sheets = len(result.used_containers)
+        chunks = _chunk_layouts(result, pages, max(1, math.ceil(n_sheets / jobs)))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            part_paths = [Path(tmp) / f"sheets_{i:05d}.pdf" for i in range(len(chunks))]
+
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                parts = pool.map(
+                    _render_chunk,
+                    [chunk for chunk, _ in chunks],
+                    [chunk_pages for _, chunk_pages in chunks],
+                    [engine] * len(chunks),
+                    part_paths,
+                )
+
+                with (
+                    output_file.open("wb") as f,
+                    StreamingPdfWriter(f, dedupe=True) as writer,
+                ):
+                    for part_path in parts:
+                        writer.append(part_path)
+                        part_path.unlink()
+
+        return output_file
+
+
+def render_layout_streaming(
+    result: AnyLayoutResult,
+    pages: Sequence[PageRef],
+    output_file: Path,
+    chunk_sheets: int,
+    engine: EmbedEngine = "xobject",
+    source: PageSource | None = None,
+) -> Path:
+    """
+    Render `result` into `output_file`, `chunk_sheets` sheets at a time.
+
+    Only the pages a chunk places are loaded from `source`, and the objects
+    parsed for them are dropped once the chunk's sheets are written to the
+    output, so memory use depends on the chunk size rather than on the length
+    of the document. Identical objects across chunks (pages placed in several
+    chunks, with their fonts and images) are stored once.
+    """
+    source = source or PageSource()
+
+    with phase("render"):
+        with (
+            output_file.open("wb") as f,
+            StreamingPdfWriter(f, dedupe=True) as writer,
+        ):
+            for chunk, chunk_pages in _chunk_layouts(result, pages, chunk_sheets):
+                sheets = render_layout(chunk, chunk_pages, engine=engine, source=source)
+                buffer = io.BytesIO()
+                sheets.write(buffer)
+
+                # pypdf objects reference each other, so the chunk is only freed
+                # by the cycle collector; collect it now, while it is still in
+                # the young generations, instead of letting chunks pile up
+                del sheets
+                gc.collect(1)
+                source.trim()
+
+                buffer.seek(0)
+                writer.append(PdfReader(buffer))
+
+        source.release()
+        return output_file
+
+
+def impose_pages_general(
+    pages: Sequence[PageObject | PageRef],
+    layouter: BaseLayouter,
+    paper: PaperRef,
+    engine: EmbedEngine = "xobject",
+    source: PageSource | None = None,
+    quantities: Sequence[int] | None = None,
+):
+    """
+    Lay out `pages` on sheets of `paper` and embed them into a new PDF.
+
+    See `render_layout` for the embedding engines. `pages` may hold
+    `PageRef`s, in which case the layout only uses their geometry and each
+    page is loaded from `source` when it is embedded. `quantities` is passed
+    on to `layout_pages`.
+    """
+    result = layout_pages(pages, layouter, paper, quantities=quantities)
+
+    return render_layout(result, pages, engine=engine, source=source)
+
+
+def make_plan(
+    pages: Sequence[PageRef], layouter: BaseLayouter, paper: PaperRef
+) -> ImpositionPlan:
+    """Compute the layout for `pages` without loading any page content."""
+    return ImpositionPlan(
+        version=PLAN_VERSION,
+        pages=list(pages),
+        layout=layout_pages(pages, layouter, paper).to_result(),
+    )
+
+
+def save_plan(plan: ImpositionPlan, path: Path) -> None:
+    """Write `plan` as compact JSON (gzip-compressed if `path` ends in .gz)."""
+    data = plan.model_dump_json(exclude_defaults=True).encode()
+
+    with (gzip.open if path.suffix == ".gz" else open)(path, "wb") as f:
+        f.write(data)
+
+
+def load_plan(path: Path) -> ImpositionPlan:
+    """Read a plan written by `save_plan`."""
+    with (gzip.open if path.suffix == ".gz" else open)(path, "rb") as f:
+        plan = ImpositionPlan.model_validate_json(f.read())
+
+    if plan.version != PLAN_VERSION:
+        raise ValueError(f"Unsupported plan version {plan.version} in {path}")
+
+    return plan
+
+
+def check_plan_pages(
+    plan: ImpositionPlan, pages: Sequence[PageRef], tolerance: float = 0.5
+) -> None:
+    """Raise if `pages` do not have the geometry the plan was computed for."""
+    if len(pages) != len(plan.pages):
+        raise ValueError(
+            f"Plan was made for {len(plan.pages)} pages, but {len(pages)} were given."
         )
 
-    return writer
+    for i, (planned, page) in enumerate(zip(plan.pages, pages)):
+        if (
+            abs(planned.width - page.width) > tolerance
+            or abs(planned.height - page.height) > tolerance
+        ):
+            raise ValueError(
+                f"Page {i} is {page.width}x{page.height}, but the plan expects "
+                f"{planned.width}x{planned.height}."
+            )
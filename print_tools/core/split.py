@@ -1,4 +1,41 @@
+from pathlib import Path
+from typing import Literal, TypeAlias
+
 from pypdf import PageObject, PdfWriter
+from pypdf.generic import NameObject, NumberObject
+
+from ..utils.embed import FormXObjectEmbedder
+from ..utils.pdfstream import StreamingPdfWriter, Tile
+from ..utils.selection import PageSelection
+
+SplitEngine: TypeAlias = Literal["mediabox", "xobject"]
+
+
+def _tiles(
+    w: float,
+    h: float,
+    target_size_pt: tuple[float, float],
+    epsilon: float,
+) -> list[Tile]:
+    """Return the (llx, lly, urx, ury) tiles a w x h page is split into."""
+    t_w, t_h = target_size_pt
+
+    cols = int((w + epsilon) // t_w)
+    rows = int((h + epsilon) // t_h)
+
+    tiles = []
+    for r in range(rows):
+        for c in range(cols):
+            llx, lly = c * t_w, r * t_h
+            urx, ury = min(llx + t_w, w), min(lly + t_h, h)
+
+            # skip slivers
+            if (urx - llx) < epsilon or (ury - lly) < epsilon:
+                continue
+
+            tiles.append((llx, lly, urx, ury))
+
+    return tiles
 
 
 def split_pdf_pages_by_size(
@@ -6,28 +43,63 @@ def split_pdf_pages_by_size(
     target_size_pt: tuple[float, float],
     *,
     epsilon: float = 2.0,
+    engine: SplitEngine = "mediabox",
 ):
-    writer = PdfWriter()
+    """
+    Split every page into tiles of `target_size_pt`.
 
-    t_w, t_h = target_size_pt
+    The `mediabox` engine adds the page once per tile, with the mediabox moved
+    onto that tile. The `xobject` engine wraps each page once as a Form XObject
+    and gives every tile a page of its own size, with the origin at its lower
+    left corner, that draws the form shifted into place.
+    """
+    writer = PdfWriter()
+    embedder = FormXObjectEmbedder(writer) if engine == "xobject" else None
 
     for page in pages:
         w, h = float(page.mediabox.width), float(page.mediabox.height)
+        x0, y0 = float(page.mediabox.left), float(page.mediabox.bottom)
 
-        cols = int((w + epsilon) // t_w)
-        rows = int((h + epsilon) // t_h)
-
-        for r in range(rows):
-            for c in range(cols):
-                llx, lly = c * t_w, r * t_h
-                urx, ury = min(llx + t_w, w), min(lly + t_h, h)
-
-                # skip slivers
-                if (urx - llx) < epsilon or (ury - lly) < epsilon:
-                    continue
-
+        for llx, lly, urx, ury in _tiles(w, h, target_size_pt, epsilon):
+            if embedder is None:
                 page.mediabox.lower_left = (llx, lly)
                 page.mediabox.upper_right = (urx, ury)
                 writer.add_page(page)
+                continue
+
+            tile = writer.add_blank_page(width=urx - llx, height=ury - lly)
+            if page.rotation:
+                tile[NameObject("/Rotate")] = NumberObject(page.rotation)
+            embedder.embed_page(tile, page, position=(-(x0 + llx), -(y0 + lly)))
+
+    if embedder:
+        embedder.flush()
 
     return writer
+
+
+def split_pdf_files_passthrough(
+    input_files: list[Path | PageSelection],
+    output_file: Path,
+    target_size_pt: tuple[float, float],
+    *,
+    epsilon: float = 2.0,
+) -> Path:
+    """
+    Split the pages of `input_files` into `output_file` without going through
+    pypdf's document model.
+
+    Stream data and dictionaries are copied verbatim (only object numbers are
+    rewritten), each source page's objects are written once, and every tile is
+    a small page dictionary that references them with its own mediabox.
+    """
+
+    def page_tiles(page: PageObject) -> list[Tile]:
+        w, h = float(page.mediabox.width), float(page.mediabox.height)
+        return _tiles(w, h, target_size_pt, epsilon)
+
+    with output_file.open("wb") as f, StreamingPdfWriter(f) as writer:
+        for pdf in input_files:
+            writer.append(pdf, tiles=page_tiles)
+
+    return output_file
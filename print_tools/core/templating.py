@@ -2,15 +2,471 @@
 Templating utilities for overlaying text blocks on PDF templates.
 """
 
+import functools
 import io
+import itertools
+import string
+import tempfile
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Literal, Sequence
 
 from reportlab.pdfgen import canvas
 from reportlab.lib import colors
 from pypdf import PdfReader, PdfWriter
+from pypdf._page import PageObject
+from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
 
 from ..utils import hex_to_colour, register_font
-from ..utils.parsing import parse_blocks
+from ..utils.embed import page_to_form_xobject
+from ..utils.fonts import MIN_FONT_SIZE, fit_font_size
+from ..utils.metrics import phase, record_output
+from ..utils.parsing import parse_blocks, parse_records
+from ..utils.pdfstream import StreamingPdfWriter
+
+# Attributes of the template page that every generated page takes over.
+_PAGE_KEYS = ("/MediaBox", "/CropBox", "/BleedBox", "/TrimBox", "/ArtBox", "/Rotate")
+
+_TEMPLATE_NAME = NameObject("/PTTemplate")
+
+_ALIGNMENTS = ("left", "centre", "right")
+
+
+class TemplateCache:
+    """
+    A template page, parsed once and shared by every generated document.
+
+    The page is wrapped as a Form XObject a single time. Each generated page
+    draws that form, with its own content going on top, so the template's
+    content stream is never parsed or rewritten per document; the form and
+    its resources are only copied into each output. Annotations of the
+    template page are not carried over.
+    """
+
+    def __init__(self, template_path: Path, page_index: int = 0):
+        self.page = PdfReader(template_path).pages[page_index]
+        self.width = float(self.page.mediabox.width)
+        self.height = float(self.page.mediabox.height)
+
+        self._writer = PdfWriter()
+        self._form = page_to_form_xobject(self._writer, self.page)
+
+    def add_page(self, writer: PdfWriter) -> PageObject:
+        """Add a page showing the template to `writer` and return it."""
+        page = writer.add_blank_page(width=self.width, height=self.height)
+        for key in _PAGE_KEYS:
+            if key in self.page:
+                page[NameObject(key)] = self.page.raw_get(key).clone(writer)
+
+        page[NameObject("/Resources")] = DictionaryObject(
+            {
+                NameObject("/XObject"): DictionaryObject(
+                    {_TEMPLATE_NAME: self._form.clone(writer)}
+                )
+            }
+        )
+
+        content = DecodedStreamObject()
+        content.set_data(f"q {_TEMPLATE_NAME} Do Q".encode("ascii"))
+        page[NameObject("/Contents")] = writer._add_object(content)
+
+        return page
+
+
+Document = tuple[Path, Iterable[Any]]  # output path, one item per page
+
+# Drawing of one item (a block, a record) onto the overlay of its page.
+Drawer = Callable[[canvas.Canvas, float, float, Any, "TextStyle"], None]
+
+# Pages rendered at a time: what a worker is given per task (so each task
+# parses the template once), and what is held in memory of a large file.
+BATCH_PAGES = 256
+
+
+@dataclass(frozen=True, slots=True)
+class TextStyle:
+    """
+    Font and colour of the text drawn on the template.
+
+    Text that is fitted (to the width of a slot, or with `fit_margin` to the
+    page) is set at the largest size up to `font_size` that fits, but no
+    smaller than `min_font_size`.
+    """
+
+    font_name: str = "Helvetica"
+    font_size: int = 18
+    line_spacing: int = 4
+    text_colour: str = "#000000"
+    min_font_size: float = MIN_FONT_SIZE
+    fit_margin: float | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class TextSlot:
+    """
+    A line of text at a fixed position on the template, filled in from the
+    fields of each record.
+
+    `text` is a format string such as "{first} {last}"; fields a record lacks
+    are left empty. (x, y) is in points from the lower left corner of the
+    template, and `align` says whether the text starts, is centred or ends
+    there. With a `width`, text wider than that is set smaller to fit.
+
+    Format specs apply to the values as they are read: CSV fields are always
+    strings, so "{price:.2f}" only works with numbers from JSON Lines, while
+    "{name:>20}" works with either.
+    """
+
+    x: float
+    y: float
+    text: str
+    align: Literal["left", "centre", "right"] = "left"
+    width: float | None = None
+
+    @classmethod
+    def parse(cls, spec: str) -> "TextSlot":
+        """
+        Parse "X,Y[,ALIGN][,WIDTH]=TEXT", e.g. "72,700,centre={name}" or
+        "72,700,centre,200={name}".
+        """
+        where, eq, text = spec.partition("=")
+        parts = [part.strip() for part in where.split(",")]
+        if not eq or not 2 <= len(parts) <= 4:
+            raise ValueError(f"{spec!r} is not a slot like 72,700=text")
+
+        aligns = [p.lower() for p in parts[2:] if p.lower() in _ALIGNMENTS]
+        widths = [p for p in parts[2:] if p.lower() not in _ALIGNMENTS]
+        if len(aligns) > 1 or len(widths) > 1:
+            raise ValueError(f"{spec!r} gives more than one alignment or width")
+
+        align = aligns[0] if aligns else "left"
+        width = None
+        if widths:
+            try:
+                width = float(widths[0])
+            except ValueError:
+                raise ValueError(
+                    f"Unknown alignment {widths[0]!r}; use left, centre or right"
+                ) from None
+            if width <= 0:
+                raise ValueError(f"Slot width must be positive, got {widths[0]}")
+
+        # unbalanced braces raise here
+        for _, field, _, _ in string.Formatter().parse(text):
+            if field is not None and (field == "" or field[0].isdigit()):
+                raise ValueError(
+                    f"{spec!r} has a positional field; name a record field instead"
+                )
+
+        return cls(
+            x=float(parts[0]), y=float(parts[1]), text=text, align=align, width=width
+        )
+
+
+class SlotFormatError(ValueError):
+    """The text of a slot cannot be formatted with the fields of a record."""
+
+
+class _Empty:
+    """A missing field: empty, whatever the format spec."""
+
+    def __format__(self, spec: str) -> str:
+        return ""
+
+
+_EMPTY = _Empty()
+
+
+class _Fields(dict):
+    def __missing__(self, key: str) -> _Empty:
+        return _EMPTY
+
+
+def format_slots(
+    slots: Sequence[TextSlot], record: dict[str, Any], number: int
+) -> list[str]:
+    """
+    The text of each of `slots` for `record`, the `number`th record (counted
+    from 1, for error messages).
+    """
+    fields = _Fields((k, _EMPTY if v is None else v) for k, v in record.items())
+    texts = []
+    for slot in slots:
+        try:
+            texts.append(slot.text.format_map(fields))
+        except (ValueError, TypeError, AttributeError, IndexError, KeyError) as e:
+            raise SlotFormatError(
+                f"Slot {slot.text!r} cannot be filled from record {number}: {e}"
+            ) from None
+    return texts
+
+
+def draw_block(
+    c: canvas.Canvas, w: float, h: float, lines: list[str], style: TextStyle
+) -> None:
+    """
+    Draw `lines` centred on the page, shrunk to fit within `style.fit_margin`
+    of its edges if that is set.
+    """
+    line_height = style.font_size
+    if style.fit_margin is not None:
+        fontname = register_font(style.font_name)
+        line_height = fit_font_size(
+            lines,
+            fontname,
+            style.font_size,
+            max_width=w - 2 * style.fit_margin,
+            max_height=h - 2 * style.fit_margin,
+            line_spacing=style.line_spacing,
+            min_size=style.min_font_size,
+        )
+        c.setFont(fontname, line_height)
+
+    total_height = line_height * len(lines) + style.line_spacing * (len(lines) - 1)
+    first_y = (h + total_height) / 2 - line_height  # top line y
+
+    for i, txt in enumerate(lines):
+        y = first_y - i * (line_height + style.line_spacing)
+        c.drawCentredString(w / 2, y, txt)  # centre‑aligned horizontally
+
+
+def draw_record(
+    slots: Sequence[TextSlot],
+    c: canvas.Canvas,
+    w: float,
+    h: float,
+    record: tuple[int, dict[str, Any]],
+    style: TextStyle,
+) -> None:
+    """Draw the fields of a (number, record) pair into `slots`."""
+    texts = format_slots(slots, record[1], record[0])
+    draw = {
+        "left": c.drawString,
+        "centre": c.drawCentredString,
+        "right": c.drawRightString,
+    }
+    fontname = register_font(style.font_name)
+    current = style.font_size
+
+    for slot, text in zip(slots, texts):
+        if slot.width is not None:
+            size = fit_font_size(
+                [text],
+                fontname,
+                style.font_size,
+                max_width=slot.width,
+                min_size=style.min_font_size,
+            )
+            if size != current:
+                c.setFont(fontname, size)
+                current = size
+        elif current != style.font_size:
+            c.setFont(fontname, style.font_size)
+            current = style.font_size
+
+        draw[slot.align](slot.x, slot.y, text)
+
+
+def _batched(items: Iterable, size: int) -> Iterator[list]:
+    it = iter(items)
+    while batch := list(itertools.islice(it, size)):
+        yield batch
+
+
+def _imap(
+    pool: ProcessPoolExecutor, fn: Callable, tasks: Iterable[tuple], window: int
+) -> Iterator:
+    """
+    Like `pool.map`, but with at most `window` tasks submitted at a time, so
+    `tasks` is consumed as the results come in rather than all up front.
+    """
+    pending: deque[Future] = deque()
+    for args in tasks:
+        pending.append(pool.submit(fn, *args))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+
+    while pending:
+        yield pending.popleft().result()
+
+
+def _documents(
+    items: Iterable[Any], output_dir: Path, stem: str, per_file: int
+) -> Iterator[Document]:
+    """
+    Group `items` into the documents to write: `{stem}_NNN.pdf` with one
+    item each, `{stem}s_NNN.pdf` with `per_file` items each, or a single
+    `{stem}s.pdf` with all of them if `per_file` is 0.
+    """
+    if per_file == 1:
+        for idx, item in enumerate(items, 1):
+            yield output_dir / f"{stem}_{idx:03d}.pdf", [item]
+    elif per_file == 0:
+        yield output_dir / f"{stem}s.pdf", items
+    else:
+        for idx, batch in enumerate(_batched(items, per_file), 1):
+            yield output_dir / f"{stem}s_{idx:03d}.pdf", batch
+
+
+def _render_pages(
+    template: TemplateCache,
+    items: Iterable[Any],
+    draw: Drawer,
+    style: TextStyle,
+    fontname: str,
+    colour,
+) -> PdfWriter:
+    """Render a page per item into a new writer."""
+    w, h = template.width, template.height
+    writer = PdfWriter()
+
+    for item in items:
+        with phase("render"):
+            buf = io.BytesIO()
+            c = canvas.Canvas(buf, pagesize=(w, h))
+
+            c.setFont(fontname, style.font_size)
+            c.setFillColor(colour)
+            draw(c, w, h, item, style)
+            c.save()
+
+            # draw the overlay on top of the template
+            overlay_reader = PdfReader(buf)
+            overlay_page = overlay_reader.pages[0]
+
+            base_page = template.add_page(writer)
+            base_page.merge_page(overlay_page)
+
+    return writer
+
+
+def _write_documents(
+    template_path: Path,
+    documents: Iterable[Document],
+    draw: Drawer,
+    style: TextStyle,
+) -> Iterator[Path]:
+    """Render and write `documents`, yielding each path once it is written."""
+    fontname = register_font(style.font_name)
+    colour = getattr(colors, style.text_colour, None)
+    colour = colour or hex_to_colour(style.text_colour)
+
+    with phase("parse"):
+        template = TemplateCache(template_path)
+
+    for out_path, items in documents:
+        # the pages of one writer share one copy of the template
+        writers = (
+            _render_pages(template, batch, draw, style, fontname, colour)
+            for batch in _batched(items, BATCH_PAGES)
+        )
+        first = next(writers, None)
+        second = next(writers, None)
+        if first is None:
+            first = PdfWriter()
+
+        with out_path.open("wb") as fh:
+            if second is None:
+                with phase("write"):
+                    first.write(fh)
+            else:
+                # too many pages to hold at once: write them a batch at a time,
+                # keeping only the xref offsets of the pages written so far;
+                # the batches' copies of the template form (and its fonts and
+                # images) are identical, so the output stores it only once
+                batches = itertools.chain((first, second), writers)
+                first = second = None
+
+                with StreamingPdfWriter(fh, dedupe=True) as out:
+                    for writer in batches:
+                        with phase("write"):
+                            buf = io.BytesIO()
+                            writer.write(buf)
+                            out.append(PdfReader(buf))
+
+        yield out_path
+
+
+def _write_task(
+    template_path: Path, documents: list[Document], draw: Drawer, style: TextStyle
+) -> list[Path]:
+    return list(_write_documents(template_path, documents, draw, style))
+
+
+def _write_parallel(
+    template_path: Path,
+    items: Iterable[Any],
+    output_dir: Path,
+    stem: str,
+    per_file: int,
+    draw: Drawer,
+    style: TextStyle,
+    jobs: int,
+) -> Iterator[Path]:
+    """
+    Write the documents in `jobs` worker processes, `BATCH_PAGES` pages a
+    task. A single file is rendered in parts by the workers, which are then
+    stitched together; the parts' identical copies of the template form, with
+    its fonts and images, are stored only once.
+    """
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        if per_file == 0:
+            out_path = output_dir / f"{stem}s.pdf"
+            with tempfile.TemporaryDirectory() as tmp:
+                tasks = (
+                    (
+                        template_path,
+                        [(Path(tmp) / f"part_{i:05d}.pdf", batch)],
+                        draw,
+                        style,
+                    )
+                    for i, batch in enumerate(_batched(items, BATCH_PAGES))
+                )
+                with (
+                    out_path.open("wb") as f,
+                    StreamingPdfWriter(f, dedupe=True) as writer,
+                ):
+                    for (part_path,) in _imap(pool, _write_task, tasks, 2 * jobs):
+                        writer.append(part_path)
+                        part_path.unlink()
+
+            yield out_path
+            return
+
+        documents = _documents(items, output_dir, stem, per_file)
+        tasks = (
+            (template_path, batch, draw, style)
+            for batch in _batched(documents, max(1, BATCH_PAGES // per_file))
+        )
+        for paths in _imap(pool, _write_task, tasks, 2 * jobs):
+            yield from paths
+
+
+def _generate(
+    template_path: Path,
+    items: Iterable[Any],
+    output_dir: Path,
+    stem: str,
+    draw: Drawer,
+    style: TextStyle,
+    per_file: int,
+    jobs: int,
+) -> None:
+    """Write a page per item of `items` (see `_documents` for the files)."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    if jobs > 1:
+        with phase("render"):
+            for out_path in _write_parallel(
+                template_path, items, output_dir, stem, per_file, draw, style, jobs
+            ):
+                record_output(out_path)
+    else:
+        documents = _documents(items, output_dir, stem, per_file)
+        for out_path in _write_documents(template_path, documents, draw, style):
+            record_output(out_path)
 
 
 def create_labeled_pdfs(
@@ -21,10 +477,24 @@ def create_labeled_pdfs(
     font_size: int = 18,
     line_spacing: int = 4,
     text_colour: str = "#000000",
+    blocks_per_file: int = 1,
+    jobs: int = 1,
+    fit_margin: float | None = None,
+    min_font_size: float = MIN_FONT_SIZE,
 ) -> None:
     """
     Create labeled PDFs by overlaying text blocks on a template.
 
+    By default every block becomes its own `block_NNN.pdf`. With
+    `blocks_per_file` > 1, the blocks are written that many pages to a file
+    (`blocks_NNN.pdf`), and with 0 all of them go into a single `blocks.pdf`.
+    The pages of a file share one copy of the template.
+
+    With `jobs` > 1, the blocks are rendered in that many worker processes.
+
+    With `fit_margin`, each block is set at the largest size up to
+    `font_size` at which it fits within that many points of the page edges.
+
     Args:
         template_path: Path to the PDF template file
         blocks_path: Path to the text file containing blocks separated by ---
@@ -33,46 +503,90 @@ def create_labeled_pdfs(
         font_size: Size of the text in points
         line_spacing: Extra space between lines in points
         text_colour: Color name or hex code (#RRGGBB)
+        blocks_per_file: Blocks (pages) per output file; 0 for a single file
+        jobs: Number of worker processes
+        fit_margin: Shrink blocks to fit the page less this margin in points
+        min_font_size: Smallest size blocks are shrunk to
     """
-    fontname = register_font(font_name)
-    colour = getattr(colors, text_colour, None)
-    colour = colour or hex_to_colour(text_colour)
-
-    output_dir.mkdir(parents=True, exist_ok=True)
-
-    tpl_reader = PdfReader(str(template_path))
-    tpl_page = tpl_reader.pages[0]
-    w = float(tpl_page.mediabox.width)
-    h = float(tpl_page.mediabox.height)
-
-    for idx, lines in enumerate(parse_blocks(blocks_path), 1):
-        base_page = PdfReader(str(template_path)).pages[0]  # fresh copy of the template
+    _generate(
+        template_path,
+        parse_blocks(blocks_path),
+        output_dir,
+        "block",
+        draw_block,
+        TextStyle(
+            font_name,
+            font_size,
+            line_spacing,
+            text_colour,
+            min_font_size=min_font_size,
+            fit_margin=fit_margin,
+        ),
+        blocks_per_file,
+        jobs,
+    )
 
-        buf = io.BytesIO()
-        c = canvas.Canvas(buf, pagesize=(w, h))
 
-        c.setFont(fontname, font_size)
-        c.setFillColor(colour)
-
-        line_height = font_size
-        total_height = line_height * len(lines) + line_spacing * (len(lines) - 1)
-        first_y = (h + total_height) / 2 - line_height  # top line y
+def fill_records(
+    template_path: Path,
+    records_path: Path,
+    output_dir: Path,
+    slots: Sequence[TextSlot],
+    font_name: str = "Helvetica",
+    font_size: int = 12,
+    text_colour: str = "#000000",
+    records_per_file: int = 1,
+    jobs: int = 1,
+    min_font_size: float = MIN_FONT_SIZE,
+) -> None:
+    """
+    Create a page per record of a CSV or JSON Lines file, with the record's
+    fields drawn into `slots` on the template.
 
-        for i, txt in enumerate(lines):
-            y = first_y - i * (line_height + line_spacing)
-            c.drawCentredString(w / 2, y, txt)  # centre‑aligned horizontally
+    Records are read and rendered as a stream. With `records_per_file` set,
+    memory use does not depend on the number of records; a single file
+    (`records_per_file=0`) is written a batch at a time, but still keeps a
+    few bytes of cross-reference state per page until it is finished.
+    Output files are named like those of `create_labeled_pdfs`, with
+    `record` in place of `block`.
 
-        c.save()
+    Text in slots with a width is set at the largest size up to `font_size`
+    that fits the slot.
 
-        # merge overlay with the template
-        overlay_reader = PdfReader(buf)
-        overlay_page = overlay_reader.pages[0]
-        base_page.merge_page(overlay_page)  # draw overlay onto the fresh copy
+    The slots are tried on the first record before anything is written. A
+    record they cannot be formatted with (see `TextSlot` on format specs)
+    raises `SlotFormatError`, naming the slot and the record number.
 
-        out_writer = PdfWriter()
-        out_writer.add_page(base_page)
-        out_path = output_dir / f"block_{idx:03d}.pdf"
-        with out_path.open("wb") as fh:
-            out_writer.write(fh)
+    Args:
+        template_path: Path to the PDF template file
+        records_path: Path to a .csv file with a header row, or a .jsonl file
+        output_dir: Directory to save the generated PDFs
+        slots: Where and what text to draw for each record
+        font_name: Font name or path to TTF/OTF file
+        font_size: Size of the text in points
+        text_colour: Color name or hex code (#RRGGBB)
+        records_per_file: Records (pages) per output file; 0 for a single file
+        jobs: Number of worker processes
+        min_font_size: Smallest size text is shrunk to when fitting a slot
+    """
+    records = enumerate(parse_records(records_path), 1)
+    first = next(records, None)
+    if first is not None:
+        format_slots(slots, first[1], first[0])
+        records = itertools.chain([first], records)
 
-        print(f"Wrote {out_path}")
+    _generate(
+        template_path,
+        records,
+        output_dir,
+        "record",
+        functools.partial(draw_record, tuple(slots)),
+        TextStyle(
+            font_name,
+            font_size,
+            text_colour=text_colour,
+            min_font_size=min_font_size,
+        ),
+        records_per_file,
+        jobs,
+    )
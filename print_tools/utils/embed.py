@@ -1,5 +1,18 @@
-from pypdf import Transformation
+from typing import Hashable
+
+from pypdf import PdfWriter, Transformation
 from pypdf._page import PageObject
+from pypdf.filters import ASCII85Decode, ASCIIHexDecode
+from pypdf.generic import (
+    ArrayObject,
+    DecodedStreamObject,
+    DictionaryObject,
+    EncodedStreamObject,
+    FloatObject,
+    IndirectObject,
+    NameObject,
+    NullObject,
+)
 
 
 def create_transformation(
@@ -66,3 +79,180 @@ def embed_page(
 
     # Overlay with one call; overlay page itself is left untouched.
     base.merge_transformed_page(overlay, op)
+
+
+def _fmt(value: float) -> str:
+    """Format a number for a content stream operand."""
+    text = f"{float(value):.4f}".rstrip("0").rstrip(".")
+    return "0" if text in ("", "-0") else text
+
+
+_ASCII_FILTERS = {
+    "/ASCII85Decode": ASCII85Decode,
+    "/A85": ASCII85Decode,
+    "/ASCIIHexDecode": ASCIIHexDecode,
+    "/AHx": ASCIIHexDecode,
+}
+
+
+def _compressed_contents(
+    writer: PdfWriter, page: PageObject
+) -> EncodedStreamObject | None:
+    """
+    Copy of the page content as it is stored, if it is a single compressed
+    stream, so it need not be decompressed and compressed again. ASCII
+    encodings, which only make the stream larger, are undone. Returns None
+    for content in several streams, or not compressed.
+    """
+    contents = page.get("/Contents")
+    contents = contents.get_object() if contents is not None else None
+    if not isinstance(contents, EncodedStreamObject):
+        return None
+
+    filters = contents.get("/Filter", [])
+    filters = [filters] if isinstance(filters, str) else list(filters)
+    parms = contents.get("/DecodeParms")
+    data = contents._data
+
+    while filters and filters[0] in _ASCII_FILTERS:
+        data = _ASCII_FILTERS[filters.pop(0)].decode(data)
+        # a single parameter dict cannot belong to the filters left over
+        parms = ArrayObject(parms[1:]) if isinstance(parms, ArrayObject) else None
+
+    if not filters:
+        return None
+    if isinstance(parms, ArrayObject) and all(
+        isinstance(p.get_object(), NullObject) for p in parms
+    ):
+        parms = None
+
+    form = EncodedStreamObject()
+    form._data = data
+    form[NameObject("/Filter")] = ArrayObject(map(NameObject, filters))
+    if parms:
+        form[NameObject("/DecodeParms")] = parms.clone(writer)
+    return form
+
+
+def page_to_form_xobject(writer: PdfWriter, page: PageObject) -> IndirectObject:
+    """
+    Wrap `page` as a Form XObject owned by `writer` and return its reference.
+
+    The form keeps the page's coordinate system (its /BBox is the page mediabox),
+    so a transformation that works with `merge_transformed_page` works unchanged
+    when the form is drawn with `cm` + `Do`.
+    """
+    form = _compressed_contents(writer, page)
+
+    if form is None:
+        contents = page.get_contents()
+        form = DecodedStreamObject()
+        form.set_data(contents.get_data() if contents is not None else b"")
+        form = form.flate_encode()
+
+    form[NameObject("/Type")] = NameObject("/XObject")
+    form[NameObject("/Subtype")] = NameObject("/Form")
+    form[NameObject("/BBox")] = ArrayObject(
+        FloatObject(float(v)) for v in page.mediabox
+    )
+
+    resources = page.raw_get("/Resources") if "/Resources" in page else None
+    form[NameObject("/Resources")] = (
+        resources.clone(writer) if resources is not None else DictionaryObject()
+    )
+
+    return writer._add_object(form)
+
+
+class FormXObjectEmbedder:
+    """
+    Place source pages on sheets as shared Form XObjects.
+
+    Every distinct source page is wrapped only once, and each placement adds a
+    single `q ... cm /Name Do Q` to the sheet. Output size therefore grows with
+    the number of distinct pages, not with the number of placements.
+
+    Placements are buffered per sheet; call `flush` once all of them are done.
+    """
+
+    def __init__(self, writer: PdfWriter):
+        self.writer = writer
+        self._forms: dict[Hashable, tuple[NameObject, IndirectObject]] = {}
+        self._pending: dict[int, tuple[PageObject, list[str]]] = {}
+
+    def form_for(
+        self, page: PageObject, key: Hashable | None = None
+    ) -> tuple[NameObject, IndirectObject]:
+        """Return the (resource name, reference) of the form wrapping `page`."""
+        key = id(page) if key is None else key
+
+        if key not in self._forms:
+            name = NameObject(f"/PTForm{len(self._forms)}")
+            self._forms[key] = (name, page_to_form_xobject(self.writer, page))
+
+        return self._forms[key]
+
+    def embed_page(
+        self,
+        base: PageObject,
+        overlay: PageObject,
+        *,
+        position: tuple[float, float] = (0.0, 0.0),
+        scale: float = 1.0,
+        rotation: float = 0.0,
+        mirror_horizontal: bool = False,
+        mirror_vertical: bool = False,
+        transformation: Transformation | None = None,
+        key: Hashable | None = None,
+    ) -> None:
+        """Same contract as `embed_page`, but draws `overlay` as a shared form."""
+        w = overlay.mediabox.width
+        h = overlay.mediabox.height
+
+        if transformation:
+            op = transformation
+        else:
+            op = create_transformation(
+                dx=position[0],
+                dy=position[1],
+                scale=scale,
+                rotation=rotation,
+                mirror_horizontal=mirror_horizontal,
+                mirror_vertical=mirror_vertical,
+                compensate_mirror_horizontal=w if mirror_horizontal else 0.0,
+                compensate_mirror_vertical=h if mirror_vertical else 0.0,
+            )
+
+        name, ref = self.form_for(overlay, key=key)
+
+        resources = base.setdefault(NameObject("/Resources"), DictionaryObject())
+        resources = resources.get_object()
+        xobjects = resources.setdefault(NameObject("/XObject"), DictionaryObject())
+        xobjects.get_object()[name] = ref
+
+        ctm = " ".join(_fmt(v) for v in op.ctm)
+        _, ops = self._pending.setdefault(id(base), (base, []))
+        ops.append(f"q {ctm} cm {name} Do Q")
+
+    def flush(self) -> None:
+        """Write the buffered placements into the content stream of each sheet."""
+        for base, ops in self._pending.values():
+            stream = DecodedStreamObject()
+            stream.set_data("\n".join(ops).encode("ascii"))
+            ref = self.writer._add_object(stream.flate_encode())
+
+            existing = base.get("/Contents")
+            if existing is None:
+                base[NameObject("/Contents")] = ref
+            else:
+                existing = existing.get_object()
+                if isinstance(existing, ArrayObject):
+                    parts = list(existing)
+                else:
+                    first = base.raw_get("/Contents")
+                    if not isinstance(first, IndirectObject):
+                        first = self.writer._add_object(first)
+                    parts = [first]
+                base[NameObject("/Contents")] = ArrayObject([*parts, ref])
+
+        self._pending.clear()
@@ -0,0 +1,101 @@
+"""
+Font registration and text measurement, cached per process.
+"""
+
+import functools
+from pathlib import Path
+from typing import Sequence
+
+from reportlab.pdfbase import pdfmetrics, ttfonts
+
+# Smallest size and step of the sizes `fit_font_size` picks from, in points.
+MIN_FONT_SIZE = 4.0
+FONT_SIZE_STEP = 0.5
+
+# resolved font file → name it was registered under
+_registered: dict[Path, str] = {}
+
+
+def register_font(name: str) -> str:
+    """
+    Register external TTF if given a filename; otherwise assume built-in.
+
+    Returns the name to set the font by. Each file is parsed only once per
+    process; later calls return the name it was registered under.
+    """
+    if Path(name).suffix.lower() not in {".ttf", ".otf"}:
+        return name
+
+    path = Path(name).resolve()
+    if path not in _registered:
+        short = Path(name).stem
+        pdfmetrics.registerFont(ttfonts.TTFont(short, name))
+        _registered[path] = short
+    return _registered[path]
+
+
+@functools.cache
+def _char_widths(font_name: str) -> dict[str, float]:
+    return {}
+
+
+def string_width(text: str, font_name: str, font_size: float = 1.0) -> float:
+    """
+    Width of `text` set in the (registered) font `font_name`, in points.
+
+    Widths are looked up per character and remembered per font, so each
+    character is measured by reportlab once rather than every string being
+    measured again. Width scales linearly with size: callers trying several
+    sizes measure at size 1 once and multiply.
+    """
+    widths = _char_widths(font_name)
+    try:
+        return sum([widths[ch] for ch in text]) * font_size
+    except KeyError:
+        for ch in set(text).difference(widths):
+            widths[ch] = pdfmetrics.stringWidth(ch, font_name, 1)
+        return sum([widths[ch] for ch in text]) * font_size
+
+
+def fit_font_size(
+    lines: Sequence[str],
+    font_name: str,
+    max_size: float,
+    max_width: float,
+    max_height: float | None = None,
+    line_spacing: float = 0,
+    min_size: float = MIN_FONT_SIZE,
+) -> float:
+    """
+    Largest font size, at most `max_size`, at which `lines` fit in
+    `max_width` (and in `max_height`, stacked with `line_spacing` between
+    them).
+
+    Sizes are binary-searched in steps of `FONT_SIZE_STEP` down from
+    `max_size`. Text that does not fit even at `min_size` gets `min_size`.
+    """
+    widest = max((string_width(line, font_name) for line in lines), default=0.0)
+    gaps = line_spacing * (len(lines) - 1)
+
+    def fits(size: float) -> bool:
+        if widest * size > max_width:
+            return False
+        return max_height is None or size * len(lines) + gaps <= max_height
+
+    if fits(max_size):
+        return max_size
+
+    # fits(max_size - steps * FONT_SIZE_STEP) is monotonic in steps: find the
+    # fewest steps down that fit, with lo steps known not to fit
+    lo, hi = 0, int((max_size - min_size) // FONT_SIZE_STEP)
+    if hi <= lo or not fits(max_size - hi * FONT_SIZE_STEP):
+        return min(min_size, max_size)
+
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if fits(max_size - mid * FONT_SIZE_STEP):
+            hi = mid
+        else:
+            lo = mid
+
+    return max_size - hi * FONT_SIZE_STEP
@@ -1,14 +1,50 @@
+import heapq
+import itertools
 import math
+from array import array
+from typing import Iterator
 
+from ..metrics import count
+from .errors import InsufficientContainersError
 from .models import (
+    AnyLayoutResult,
     AppliedBox,
     BaseLayouter,
     Box,
+    CompactLayoutResult,
     Container,
     ContainerSpec,
+    ContainerSupply,
     LayoutResult,
 )
-from .helpers import imposition_order
+from .helpers import imposition_order, signature_order
+from .packing import (
+    BIN_INDEXES,
+    Fit,
+    GuillotineBin,
+    MaxRectsBin,
+    PackingBin,
+    SkylineBin,
+)
+from .spatial import RectIndex
+
+
+def _grid_positions(
+    size: float, extent: float, padding: float, gap: float, leeway: float
+) -> list[float]:
+    """
+    Positions of `size`-long boxes along one side of a grid, or an empty list
+    if not even one fits. They are accumulated exactly like the cursor in
+    `GridLayouter.perform_layout`, so the positions match to the last bit.
+    """
+    limit = extent - padding + leeway
+    if padding + size > limit:
+        return []
+
+    positions = [padding]
+    while positions[-1] + (size + gap) + size <= limit:
+        positions.append(positions[-1] + (size + gap))
+    return positions
 
 
 class GridLayouter(BaseLayouter):
@@ -18,6 +54,9 @@ class GridLayouter(BaseLayouter):
     The padding is applied around the entire grid, while the gap is applied between boxes.
     Leeway can be used when boxes that pretty much fit, but not exactly. Leeway is in points.
     The layout is performed in a left-to-right, bottom-to-top manner.
+    When all boxes (and containers) have the same size, positions are computed
+    directly from the grid pattern instead of walking the boxes one by one, and
+    returned as a `CompactLayoutResult`.
     """
 
     def __init__(self, padding: float = 0.0, gap: float = 0.0, leeway: float = 1.0):
@@ -25,14 +64,69 @@ class GridLayouter(BaseLayouter):
         self.gap = gap
         self.leeway = leeway
 
-    def perform_layout(
-        self, available_containers: list[Container] | ContainerSpec, boxes: list[Box]
-    ) -> LayoutResult:
-        containers = (
-            available_containers.generate_containers()
-            if isinstance(available_containers, ContainerSpec)
-            else list(available_containers)
+    def _uniform_layout(
+        self, containers: ContainerSupply, boxes: list[Box]
+    ) -> CompactLayoutResult | None:
+        """
+        Lay out boxes of identical size in closed form, or return None when
+        the general walk is needed (mixed sizes, oversized boxes, or
+        containers of different sizes).
+        """
+        if not boxes or not containers.has(0):
+            return None
+
+        w, h = boxes[0].width, boxes[0].height
+        if any(box.width != w or box.height != h for box in boxes):
+            return None
+
+        first = containers[0]
+        xs = _grid_positions(w, first.width, self.padding, self.gap, self.leeway)
+        ys = _grid_positions(h, first.height, self.padding, self.gap, self.leeway)
+        if not xs or not ys:
+            return None
+
+        per_row = len(xs)
+        per_container = per_row * len(ys)
+        n_containers = -(-len(boxes) // per_container)
+
+        for ci in range(1, n_containers):
+            container = containers[ci]
+            if container.width != first.width or container.height != first.height:
+                return None
+
+        n = len(boxes)
+        full, rest = divmod(n, per_container)
+        slot_x = [x for _ in ys for x in xs]
+        slot_y = [y for y in ys for _ in xs]
+
+        result = CompactLayoutResult(
+            used_containers=containers.used(n_containers),
+            custom_fields={
+                "padding": self.padding,
+                "gap": self.gap,
+            },
+        )
+        result.box_index = array("q", range(n))
+        result.container_index = array(
+            "q", [ci for ci in range(n_containers) for _ in range(per_container)][:n]
         )
+        result.x = array("d", slot_x * full + slot_x[:rest])
+        result.y = array("d", slot_y * full + slot_y[:rest])
+        result.scale = array("d", [1.0]) * n
+        result.rotation = array("d", [0.0]) * n
+        result.mirror = array("B", [0]) * n
+        return result
+
+    def perform_layout(
+        self,
+        available_containers: list[Container] | ContainerSpec | ContainerSupply,
+        boxes: list[Box],
+    ) -> AnyLayoutResult:
+        containers = ContainerSupply.of(available_containers)
+
+        result = self._uniform_layout(containers, boxes)
+        if result is not None:
+            return result
 
         applied_boxes: list[AppliedBox] = []
         used_containers: list[Container] = []
@@ -40,6 +134,7 @@ class GridLayouter(BaseLayouter):
         ci = 0  # current container index
         x = y = self.padding  # cursor within the current container
         row_height = 0  # tallest box in the current row
+        empty = True  # nothing placed in the current container yet
 
         for box_index, box in enumerate(boxes):
             container = containers[ci]
@@ -51,11 +146,12 @@ class GridLayouter(BaseLayouter):
                 row_height = 0
 
             # Move to next container if the box does not fit vertically
-            print(y + box.height, container.height)
             if y + box.height > container.height - self.padding + self.leeway:
+                if empty:
+                    raise InsufficientContainersError(
+                        f"Box {box_index} does not fit in an empty container."
+                    )
                 ci += 1
-                if ci >= len(containers):
-                    raise ValueError("Not enough containers to fit all boxes.")
                 container = containers[ci]
                 x = y = self.padding
                 row_height = 0
@@ -72,9 +168,10 @@ class GridLayouter(BaseLayouter):
             # Advance cursor
             x += box.width + self.gap
             row_height = max(row_height, box.height)
+            empty = False
 
         # Record the final container in use
-        used_containers.extend(containers[: ci + 1])
+        used_containers.extend(containers.used(ci + 1))
 
         return LayoutResult(
             used_containers=used_containers,
@@ -93,8 +190,12 @@ class PackLayouter(BaseLayouter):
     It supports padding and gap between boxes.
     The padding is applied around the entire grid, while the gap is applied between boxes.
     Leeway can be used when boxes that pretty much fit, but not exactly. Leeway is in points.
+    Placed boxes are kept in a spatial index and candidate points in a heap, so
+    packing thousands of small boxes stays fast.
     """
 
+    order_sensitive = False
+
     def __init__(self, padding: float = 0.0, gap: float = 0.0, leeway: float = 1.0):
         self.padding = padding
         self.gap = gap
@@ -111,7 +212,7 @@ class PackLayouter(BaseLayouter):
         w: float,
         h: float,
         container: Container,
-        placed: list[tuple[float, float, float, float]],
+        placed: RectIndex,
     ) -> bool:
         """Return True if a w x h rectangle can be placed at (x,y)."""
         # inside inner rectangle defined by padding
@@ -122,41 +223,32 @@ class PackLayouter(BaseLayouter):
             return False
 
         # keep `gap` distance to every already‑placed rectangle
-        for px, py, pw, ph in placed:
-            if not (
-                x >= px + pw + self.gap
-                or px >= x + w + self.gap
-                or y >= py + ph + self.gap
-                or py >= y + h + self.gap
-            ):
-                return False
-        return True
+        return not placed.collides(x, y, w, h, self.gap)
 
     # --------------------------------------------------------------------- #
     # main entry                                                             #
     # --------------------------------------------------------------------- #
     def perform_layout(
         self,
-        available_containers: list[Container] | ContainerSpec,
+        available_containers: list[Container] | ContainerSpec | ContainerSupply,
         boxes: list[Box],
     ) -> LayoutResult:
         # normalise container input ------------------------------------------------
-        containers = (
-            available_containers.generate_containers()
-            if isinstance(available_containers, ContainerSpec)
-            else list(available_containers)
+        containers = ContainerSupply.of(available_containers)
+        if not containers.has(0):
+            raise InsufficientContainersError("No containers available.")
+
+        # state per container, created when the container is first used ----------
+        states: list[dict] = []
+
+        # index cells about the size of a typical box ------------------------------
+        cell_size = (
+            sum(max(b.width, b.height) for b in boxes) / len(boxes) + self.gap
+            if boxes
+            else 1.0
         )
-        if not containers:
-            raise ValueError("No containers available.")
-
-        # prepare state for every container ---------------------------------------
-        states = [
-            {
-                "placed": [],  # list[(x,y,w,h)]
-                "candidates": [(self.padding, self.padding)],  # bottom‑left seed
-            }
-            for _ in containers
-        ]
+        # tie-breaker that keeps equal candidates in insertion order
+        seq = itertools.count()
 
         applied_boxes: list[AppliedBox] = []
         ci = 0  # current container index
@@ -170,16 +262,23 @@ class PackLayouter(BaseLayouter):
             placed = False
 
             while not placed:
-                if ci >= len(containers):
-                    raise ValueError("Not enough containers to fit all boxes.")
+                cont = containers[ci]
+                if ci == len(states):
+                    states.append(
+                        {
+                            "placed": RectIndex(cell_size),
+                            # heap of (y, x, seq), bottom‑left seed
+                            "candidates": [(self.padding, self.padding, next(seq))],
+                        }
+                    )
 
                 state = states[ci]
-                cont = containers[ci]
-                cand_list = state["candidates"]
+                empty = not state["placed"]
+                cand_heap = state["candidates"]
 
-                # iterate through candidate points (sorted by y, then x)
-                while cand_list and not placed:
-                    cx, cy = cand_list.pop(0)
+                # iterate through candidate points (lowest y, then x, first)
+                while cand_heap and not placed:
+                    cy, cx, _ = heapq.heappop(cand_heap)
 
                     for rot, (w, h) in (
                         (0, (box.width, box.height)),
@@ -196,25 +295,27 @@ class PackLayouter(BaseLayouter):
                                     rotation=rot,
                                 )
                             )
-                            state["placed"].append((cx, cy, w, h))
+                            state["placed"].add((cx, cy, w, h))
 
                             # new candidate points: to the right, above -----------
-                            cand_list.extend(
-                                [
-                                    (cx + w + self.gap, cy),
-                                    (cx, cy + h + self.gap),
-                                ]
+                            heapq.heappush(
+                                cand_heap, (cy, cx + w + self.gap, next(seq))
+                            )
+                            heapq.heappush(
+                                cand_heap, (cy + h + self.gap, cx, next(seq))
                             )
-                            # keep candidates ordered (bottom‑left priority) ------
-                            cand_list.sort(key=lambda p: (p[1], p[0]))
                             placed = True
                             break  # break rotation loop
 
                 if not placed:
+                    if empty:
+                        raise InsufficientContainersError(
+                            f"Box {idx} does not fit in an empty container."
+                        )
                     # move on to next container ----------------------------------
                     ci += 1
 
-        used_containers = containers[: ci + 1]
+        used_containers = containers.used(ci + 1)
 
         return LayoutResult(
             used_containers=used_containers,
@@ -226,18 +327,469 @@ class PackLayouter(BaseLayouter):
         )
 
 
+class FreeSpaceLayouter(BaseLayouter):
+    """
+    Base for packers that keep track of the free space left in each container.
+
+    Boxes are placed largest first (or in the given order, with `sort_boxes`
+    off), at the position the container's `PackingBin` rates best. Every open
+    container stays available, and
+    `bin_selection` decides which one a box goes into:
+
+        first-fit: the earliest opened container it fits in
+        best-fit: the container with the least room left that it fits in
+
+    Open containers are indexed by an upper bound on the box area they can
+    still take (e.g. their largest free rectangle), so containers that are too
+    full for a box are skipped without trying them. A new container is only opened
+    when none of the open ones can take the box. Padding, gap and leeway work
+    as in `PackLayouter`.
+    """
+
+    name = "free-space"
+    order_sensitive = False
+
+    def __init__(
+        self,
+        padding: float = 0.0,
+        gap: float = 0.0,
+        leeway: float = 1.0,
+        allow_rotation: bool = True,
+        bin_selection: str = "first-fit",
+        sort_boxes: bool = True,
+    ):
+        if bin_selection not in BIN_INDEXES:
+            raise ValueError(f"Unknown bin selection {bin_selection!r}.")
+        self.padding = padding
+        self.gap = gap
+        self.leeway = leeway
+        self.allow_rotation = allow_rotation
+        self.bin_selection = bin_selection
+        self.sort_boxes = sort_boxes
+        self.order_sensitive = not sort_boxes
+
+    def _new_bin(self, width: float, height: float) -> PackingBin:
+        raise NotImplementedError("Subclasses must implement this method.")
+
+    def _open_bin(self, container: Container) -> PackingBin:
+        # Growing the bin and every box by the gap keeps exactly `gap` between
+        # boxes without adding it along the container edges.
+        return self._new_bin(
+            container.width - 2 * self.padding + self.leeway + self.gap,
+            container.height - 2 * self.padding + self.leeway + self.gap,
+        )
+
+    def _custom_fields(self, bins: list[PackingBin]) -> dict:
+        return {
+            "padding": self.padding,
+            "gap": self.gap,
+            "algorithm": self.name,
+            "bin_selection": self.bin_selection,
+        }
+
+    def perform_layout(
+        self,
+        available_containers: list[Container] | ContainerSpec | ContainerSupply,
+        boxes: list[Box],
+    ) -> CompactLayoutResult:
+        containers = ContainerSupply.of(available_containers)
+        if not containers.has(0):
+            raise InsufficientContainersError("No containers available.")
+
+        bins: list[PackingBin] = []
+        index = BIN_INDEXES[self.bin_selection]()
+        result = CompactLayoutResult(used_containers=[])
+
+        order = enumerate(boxes)
+        if self.sort_boxes:
+            order = sorted(
+                order,
+                key=lambda t: (
+                    max(t[1].width, t[1].height) * min(t[1].width, t[1].height)
+                ),
+                reverse=True,
+            )
+
+        for idx, box in order:
+            w, h = box.width + self.gap, box.height + self.gap
+
+            fit = None
+            # a little slack for the tolerance the bins allow on each side
+            for ci in index.candidates(w * h * (1 - 1e-9)):
+                packing_bin = bins[ci]
+                fit = packing_bin.find(w, h, self.allow_rotation)
+                if fit is not None:
+                    break
+
+            if fit is None:
+                ci = len(bins)
+                packing_bin = self._open_bin(containers[ci])
+                bins.append(packing_bin)
+                index.add(packing_bin.capacity())
+                fit = packing_bin.find(w, h, self.allow_rotation)
+                if fit is None:
+                    raise InsufficientContainersError(
+                        f"Box {idx} does not fit in an empty container."
+                    )
+
+            packing_bin.place(fit, *((h, w) if fit.rotated else (w, h)))
+            packing_bin.free_area -= w * h
+            index.update(ci, packing_bin.capacity())
+
+            x, y = fit.x + self.padding, fit.y + self.padding
+            result.append(
+                box_index=idx,
+                container_index=ci,
+                # rotated pages pivot around their bottom‑right corner
+                position=(x + box.height, y) if fit.rotated else (x, y),
+                rotation=90 if fit.rotated else 0,
+            )
+
+        result.used_containers = containers.used(len(bins))
+        result.custom_fields = self._custom_fields(bins)
+        return result
+
+
+class MaxRectsLayouter(FreeSpaceLayouter):
+    """
+    MaxRects packing: every maximal free rectangle is tracked, which usually
+    gives the densest result of the packers here.
+
+    `heuristic` picks the position for each box: "bssf" (best short side fit),
+    "baf" (best area fit), "bl" (bottom-left) or "contact" (contact point).
+    """
+
+    def __init__(
+        self,
+        padding: float = 0.0,
+        gap: float = 0.0,
+        leeway: float = 1.0,
+        allow_rotation: bool = True,
+        bin_selection: str = "first-fit",
+        sort_boxes: bool = True,
+        heuristic: str = "bssf",
+    ):
+        if heuristic not in MaxRectsBin.HEURISTICS:
+            raise ValueError(f"Unknown MaxRects heuristic {heuristic!r}.")
+        super().__init__(
+            padding, gap, leeway, allow_rotation, bin_selection, sort_boxes
+        )
+        self.heuristic = heuristic
+        self.name = f"maxrects-{heuristic}"
+
+    def _new_bin(self, width: float, height: float) -> PackingBin:
+        return MaxRectsBin(width, height, self.heuristic)
+
+
+class GuillotineLayouter(FreeSpaceLayouter):
+    """
+    Guillotine packing: free space is only ever split edge to edge, so each
+    sheet can be separated with straight through-cuts.
+
+    The cut lines are returned in `custom_fields["cuts"]` as
+    (container_index, axis, position, start, end), in cutting order, with
+    positions in the middle of the gap between boxes.
+    """
+
+    name = "guillotine"
+
+    def _new_bin(self, width: float, height: float) -> PackingBin:
+        return GuillotineBin(width, height)
+
+    def _custom_fields(self, bins: list[PackingBin]) -> dict:
+        fields = super()._custom_fields(bins)
+        offset = self.padding - self.gap / 2
+        fields["cuts"] = [
+            (ci, axis, pos + offset, start + offset, end + offset)
+            for ci, packing_bin in enumerate(bins)
+            for axis, pos, start, end in packing_bin.cuts
+        ]
+        return fields
+
+
+class SkylineLayouter(FreeSpaceLayouter):
+    """
+    Skyline packing: only the top outline of the placed boxes is kept and
+    each box is put where it ends up lowest. Fast, and works best for boxes
+    of similar height.
+    """
+
+    name = "skyline"
+
+    def _new_bin(self, width: float, height: float) -> PackingBin:
+        return SkylineBin(width, height)
+
+
+PACK_ALGORITHMS: dict[str, type[BaseLayouter]] = {
+    "bottom-left": PackLayouter,
+    "maxrects-bssf": MaxRectsLayouter,
+    "maxrects-baf": MaxRectsLayouter,
+    "maxrects-bl": MaxRectsLayouter,
+    "maxrects-contact": MaxRectsLayouter,
+    "guillotine": GuillotineLayouter,
+    "skyline": SkylineLayouter,
+}
+
+
+def make_pack_layouter(
+    algorithm: str,
+    padding: float = 0.0,
+    gap: float = 0.0,
+    bin_selection: str | None = None,
+) -> BaseLayouter:
+    """
+    Create the packing layouter registered as `algorithm` in PACK_ALGORITHMS.
+
+    `bin_selection` is passed on to free-space packers; the bottom-left
+    `PackLayouter` only ever fills sheets in order and does not take one.
+    """
+    if algorithm not in PACK_ALGORITHMS:
+        raise ValueError(f"Unknown packing algorithm {algorithm!r}.")
+
+    layouter_cls = PACK_ALGORITHMS[algorithm]
+    if not issubclass(layouter_cls, FreeSpaceLayouter):
+        if bin_selection is not None:
+            raise ValueError(
+                f"The {algorithm} algorithm fills sheets in order; "
+                "use one of the other algorithms to choose a bin selection."
+            )
+        return layouter_cls(padding=padding, gap=gap)
+
+    kwargs = {"padding": padding, "gap": gap}
+    if bin_selection is not None:
+        kwargs["bin_selection"] = bin_selection
+    if layouter_cls is MaxRectsLayouter:
+        kwargs["heuristic"] = algorithm.split("-", 1)[1]
+    return layouter_cls(**kwargs)
+
+
+class GangRunLayouter(BaseLayouter):
+    """
+    Lays out `quantity` copies of each box without expanding them into
+    separate boxes, so many copies of a few artworks cost little more to lay
+    out than the artworks themselves.
+
+    Boxes of the same size form a size class. The layout is built from sheet
+    patterns: a container is filled with copies of the largest class that has
+    copies left (as a grid, upright or turned, or packed with MaxRects,
+    whichever holds most), and the space around them with copies of the
+    smaller classes. That pattern is then repeated, in bulk, on as many
+    containers as the remaining copies of its classes allow, before the next
+    pattern is built.
+
+    Every placement refers to the index of its box in `boxes`, so the renderer
+    embeds each artwork once however many copies there are.
+    """
+
+    order_sensitive = False
+
+    # Above this many copies per container, grids are not mixed with other
+    # sizes and MaxRects is not tried, to keep building a pattern cheap.
+    PATTERN_SEARCH_LIMIT = 256
+
+    def __init__(
+        self,
+        padding: float = 0.0,
+        gap: float = 0.0,
+        leeway: float = 1.0,
+        allow_rotation: bool = True,
+    ):
+        self.padding = padding
+        self.gap = gap
+        self.leeway = leeway
+        self.allow_rotation = allow_rotation
+
+    def _new_bin(self, container: Container, heuristic: str = "bssf") -> MaxRectsBin:
+        return MaxRectsBin(
+            container.width - 2 * self.padding + self.leeway + self.gap,
+            container.height - 2 * self.padding + self.leeway + self.gap,
+            heuristic,
+        )
+
+    def _base_slots(
+        self, w: float, h: float, container: Container
+    ) -> Iterator[list[tuple[float, float, bool]]]:
+        """
+        Candidate arrangements of w x h boxes alone on `container`, as bin
+        positions (x, y, rotated), upright grid first.
+        """
+        width = container.width - 2 * self.padding
+        height = container.height - 2 * self.padding
+        grids = []
+        for rotated in (False, True) if self.allow_rotation else (False,):
+            bw, bh = (h, w) if rotated else (w, h)
+            xs = _grid_positions(bw, width, 0.0, self.gap, self.leeway)
+            ys = _grid_positions(bh, height, 0.0, self.gap, self.leeway)
+            grids.append([(x, y, rotated) for y in ys for x in xs])
+        yield from grids
+
+        if max(map(len, grids)) > self.PATTERN_SEARCH_LIMIT:
+            return
+
+        bw, bh = w + self.gap, h + self.gap
+        for heuristic in ("bssf", "baf", "bl"):
+            packing_bin = self._new_bin(container, heuristic)
+            slots = []
+            while fit := packing_bin.find(bw, bh, self.allow_rotation):
+                packing_bin.place(fit, *((bh, bw) if fit.rotated else (bw, bh)))
+                slots.append((fit.x, fit.y, fit.rotated))
+            yield slots
+
+    def _pattern(
+        self,
+        container: Container,
+        sizes: list[tuple[float, float]],
+        remaining: list[int],
+    ) -> list[list[tuple[float, float, bool]]]:
+        """
+        Fill `container` starting with the first size class that has copies
+        left, and return the bin positions used for every class (an empty
+        list if that class does not fit at all).
+        """
+        first = next(k for k, left in enumerate(remaining) if left)
+        w, h = sizes[first]
+
+        best: list[list[tuple[float, float, bool]]] = []
+        best_area = 0.0
+        for base in self._base_slots(w, h, container):
+            if not base:
+                continue
+            slots = [[] for _ in sizes]
+            slots[first] = base[: remaining[first]]
+
+            if len(slots[first]) <= self.PATTERN_SEARCH_LIMIT:
+                packing_bin = self._new_bin(container)
+                for x, y, rotated in slots[first]:
+                    bw, bh = (h, w) if rotated else (w, h)
+                    packing_bin.place(
+                        Fit((), x, y, rotated), bw + self.gap, bh + self.gap
+                    )
+
+                for k in range(first + 1, len(sizes)):
+                    bw, bh = sizes[k][0] + self.gap, sizes[k][1] + self.gap
+                    while len(slots[k]) < remaining[k] and (
+                        fit := packing_bin.find(bw, bh, self.allow_rotation)
+                    ):
+                        packing_bin.place(fit, *((bh, bw) if fit.rotated else (bw, bh)))
+                        slots[k].append((fit.x, fit.y, fit.rotated))
+
+            area = sum(len(s) * cw * ch for s, (cw, ch) in zip(slots, sizes))
+            if area > best_area:
+                best, best_area = slots, area
+
+        return best
+
+    def perform_layout(
+        self,
+        available_containers: list[Container] | ContainerSpec | ContainerSupply,
+        boxes: list[Box],
+    ) -> CompactLayoutResult:
+        containers = ContainerSupply.of(available_containers)
+        if not containers.has(0):
+            raise InsufficientContainersError("No containers available.")
+
+        classes: dict[tuple[float, float], array] = {}
+        for idx, box in enumerate(boxes):
+            if box.quantity < 0:
+                raise ValueError(f"Box {idx} has a negative quantity.")
+            if box.quantity:
+                copies = classes.setdefault((box.width, box.height), array("q"))
+                copies.extend(array("q", [idx]) * box.quantity)
+
+        # largest first, like the other packers
+        sizes = sorted(classes, key=lambda size: size[0] * size[1], reverse=True)
+        copies = [classes[size] for size in sizes]
+        remaining = [len(c) for c in copies]
+
+        result = CompactLayoutResult(used_containers=[])
+        ci = 0
+        patterns = 0
+
+        while any(remaining):
+            container = containers[ci]
+            slots = self._pattern(container, sizes, remaining)
+            if not slots:
+                k = next(k for k, left in enumerate(remaining) if left)
+                raise InsufficientContainersError(
+                    f"Box {copies[k][0]} does not fit in an empty container."
+                )
+            patterns += 1
+
+            # page positions of every slot, per class
+            placed = []
+            for k, class_slots in enumerate(slots):
+                if not class_slots:
+                    continue
+                h = sizes[k][1]
+                # rotated pages pivot around their bottom-right corner
+                xs = [x + self.padding + (h if r else 0) for x, _, r in class_slots]
+                ys = [y + self.padding for _, y, _ in class_slots]
+                rotations = [90.0 if r else 0.0 for _, _, r in class_slots]
+                placed.append(
+                    (
+                        k,
+                        len(class_slots),
+                        array("d", xs),
+                        array("d", ys),
+                        array("d", rotations),
+                    )
+                )
+
+            repeats = min(remaining[k] // n for k, n, *_ in placed)
+            for repeat in range(repeats):
+                if repeat and not (
+                    containers.has(ci)
+                    and containers[ci].width == container.width
+                    and containers[ci].height == container.height
+                ):
+                    break  # a different container needs its own pattern
+
+                for k, n, xs, ys, rotations in placed:
+                    start = len(copies[k]) - remaining[k]
+                    result.box_index.extend(copies[k][start : start + n])
+                    result.container_index.extend(array("q", [ci]) * n)
+                    result.x.extend(xs)
+                    result.y.extend(ys)
+                    result.scale.extend(array("d", [1.0]) * n)
+                    result.rotation.extend(rotations)
+                    result.mirror.extend(array("B", [0]) * n)
+                    remaining[k] -= n
+                ci += 1
+
+        count("gang_patterns", patterns)
+
+        result.used_containers = containers.used(ci)
+        result.custom_fields = {
+            "padding": self.padding,
+            "gap": self.gap,
+            "patterns": patterns,
+        }
+        return result
+
+
 class BookletLayouter(BaseLayouter):
     """
     Imposes A5-sized pages on A4 sheets in printer-spread order.
     Assumes every container is an A4 side and each box is half-width (A5).
+
+    With `signature_pages` (a multiple of 4), the pages are split into
+    signatures of that many pages, each imposed on its own sheets in its own
+    printer-spread order, so signature `i` takes up containers
+    `i * signature_pages // 2` onwards. 0 imposes the whole document as one
+    signature.
     """
 
-    def __init__(self, padding: float = 0.0, gap: float = 0.0):
+    def __init__(
+        self, padding: float = 0.0, gap: float = 0.0, signature_pages: int = 0
+    ):
+        if signature_pages < 0 or signature_pages % 4:
+            raise ValueError("signature_pages must be a multiple of 4.")
         self.grid = GridLayouter(padding=padding, gap=gap)
+        self.signature_pages = signature_pages
 
     def perform_layout(
         self,
-        available_containers: list[Container] | ContainerSpec,
+        available_containers: list[Container] | ContainerSpec | ContainerSupply,
         boxes: list[Box],
     ) -> LayoutResult:
         pages = list(boxes)
@@ -255,19 +807,18 @@ class BookletLayouter(BaseLayouter):
                 * num_blanks
             )
 
-        containers = (
-            available_containers.generate_containers()
-            if isinstance(available_containers, ContainerSpec)
-            else available_containers
-        )
+        containers = ContainerSupply.of(available_containers)
 
         # one A4 *side* per container, make sure we have enough
         needed_containers = math.ceil(len(pages) / 2)
-        if needed_containers > len(containers):
-            raise ValueError("Not enough sheet sides supplied")
+        if not containers.has(needed_containers - 1):
+            raise InsufficientContainersError("Not enough sheet sides supplied")
 
         # reorder pages for imposition
-        imposed_order = imposition_order(len(pages))
+        if self.signature_pages:
+            imposed_order = signature_order(len(pages), self.signature_pages)
+        else:
+            imposed_order = imposition_order(len(pages))
         ordered_boxes = [pages[i - 1] for i in imposed_order]  # to 0‑based
 
         # run the existing two‑up grid
@@ -293,6 +844,7 @@ class BookletLayouter(BaseLayouter):
         result.custom_fields["imposed_order"] = imposed_order
         result.custom_fields["padding"] = self.grid.padding
         result.custom_fields["gap"] = self.grid.gap
+        result.custom_fields["signature_pages"] = self.signature_pages
 
         return result
 
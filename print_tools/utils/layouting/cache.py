@@ -0,0 +1,196 @@
+"""
+Memoisation of layout results across jobs with the same geometry.
+"""
+
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+from ..metrics import count
+from .models import (
+    AnyLayoutResult,
+    BaseLayouter,
+    Box,
+    Container,
+    ContainerSpec,
+    ContainerSupply,
+    LayoutResult,
+)
+
+
+def _describe(value: Any) -> Any:
+    """JSON-friendly description of a layouter and its parameters."""
+    if isinstance(value, BaseLayouter):
+        cls = type(value)
+        return {
+            "class": f"{cls.__module__}.{cls.__qualname__}",
+            "params": {k: _describe(v) for k, v in sorted(vars(value).items())},
+        }
+    if isinstance(value, (list, tuple)):
+        return [_describe(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _describe(v) for k, v in value.items()}
+    return value
+
+
+def _container_key(container: Container) -> list:
+    return [container.width, container.height, container.custom_fields]
+
+
+class LayoutCache:
+    """
+    Least-recently-used store of layout results, keyed by a string.
+
+    Up to `max_entries` results are kept in memory. With a `directory`, results
+    are also written there as JSON, and the least recently used files are
+    removed once they take up more than `max_bytes`.
+    """
+
+    def __init__(
+        self,
+        directory: Path | None = None,
+        max_entries: int = 128,
+        max_bytes: int = 64 * 1024 * 1024,
+    ):
+        self.directory = Path(directory) if directory is not None else None
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._memory: OrderedDict[str, LayoutResult] = OrderedDict()
+
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> LayoutResult | None:
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key].model_copy(deep=True)
+
+        if self.directory is None:
+            return None
+
+        path = self._path(key)
+        try:
+            result = LayoutResult.model_validate_json(path.read_bytes())
+        except (OSError, ValueError):
+            return None
+
+        os.utime(path)  # mark as recently used
+        self._remember(key, result)
+        return result.model_copy(deep=True)
+
+    def put(self, key: str, result: AnyLayoutResult) -> None:
+        result = result.to_result().model_copy(deep=True)
+        self._remember(key, result)
+
+        if self.directory is not None:
+            tmp = self._path(key).with_suffix(".tmp")
+            tmp.write_text(result.model_dump_json(exclude_defaults=True))
+            tmp.replace(self._path(key))
+            self._evict_files()
+
+    def _remember(self, key: str, result: LayoutResult) -> None:
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_files(self) -> None:
+        files = []
+        for path in self.directory.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+class CachedLayouter(BaseLayouter):
+    """
+    Wrap a layouter so that repeated jobs reuse earlier results.
+
+    Results are keyed by the layouter's class and parameters, the container
+    dimensions and the box dimensions and quantities. For layouters that are not order
+    sensitive, the boxes are laid out in a canonical (size-sorted) order, so
+    any job with the same multiset of box sizes is a hit; the stored box
+    indices are mapped back to the caller's order.
+
+    A `ContainerSupply` cannot be described without drawing containers from
+    it, so such calls are passed straight to the wrapped layouter.
+    """
+
+    def __init__(self, layouter: BaseLayouter, cache: LayoutCache | None = None):
+        self.layouter = layouter
+        self.cache = cache or LayoutCache()
+        self.order_sensitive = layouter.order_sensitive
+
+    def _key(
+        self,
+        available_containers: list[Container] | ContainerSpec,
+        boxes: list[Box],
+    ) -> str:
+        if isinstance(available_containers, ContainerSpec):
+            containers = {
+                "container": _container_key(available_containers.container),
+                "max_amount": available_containers.max_amount,
+            }
+        else:
+            containers = [_container_key(c) for c in available_containers]
+
+        description = {
+            "layouter": _describe(self.layouter),
+            "containers": containers,
+            "boxes": [[b.width, b.height, b.quantity, b.custom_fields] for b in boxes],
+        }
+        data = json.dumps(description, sort_keys=True, default=repr).encode()
+        return hashlib.sha256(data).hexdigest()
+
+    def perform_layout(
+        self,
+        available_containers: list[Container] | ContainerSpec | ContainerSupply,
+        boxes: list[Box],
+    ) -> AnyLayoutResult:
+        if isinstance(available_containers, ContainerSupply):
+            return self.layouter.perform_layout(available_containers, boxes)
+
+        if self.layouter.order_sensitive:
+            order = None
+            ordered = boxes
+        else:
+            order = sorted(
+                range(len(boxes)),
+                key=lambda i: (
+                    boxes[i].width,
+                    boxes[i].height,
+                    boxes[i].quantity,
+                    json.dumps(boxes[i].custom_fields, sort_keys=True, default=repr),
+                ),
+            )
+            ordered = [boxes[i] for i in order]
+
+        key = self._key(available_containers, ordered)
+        result = self.cache.get(key)
+
+        if result is None:
+            count("layout_cache_misses")
+            result = self.layouter.perform_layout(available_containers, ordered)
+            self.cache.put(key, result)
+        else:
+            count("layout_cache_hits")
+
+        if order is not None:
+            result.remap_boxes(order)
+
+        return result
@@ -4,7 +4,7 @@ class BaseLayoutError(Exception):
     pass
 
 
-class InsufficientContainersError(BaseLayoutError):
+class InsufficientContainersError(BaseLayoutError, ValueError):
     """Raised when there are not enough containers to fit the boxes."""
 
     def __init__(self, message: str):
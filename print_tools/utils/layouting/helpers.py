@@ -56,3 +56,17 @@ def imposition_order(total_pages: int) -> list[int]:
         left += 1
         right -= 1
     return order
+
+
+def signature_order(total_pages: int, signature_pages: int) -> list[int]:
+    """
+    `imposition_order` applied to each signature of `signature_pages` pages in
+    turn; the last signature may be shorter.
+    """
+    if signature_pages <= 0 or signature_pages % 4:
+        raise ValueError("Signature pages must be a positive multiple of 4")
+    order = []
+    for start in range(0, total_pages, signature_pages):
+        size = min(signature_pages, total_pages - start)
+        order += [start + page for page in imposition_order(size)]
+    return order
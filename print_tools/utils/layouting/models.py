@@ -1,7 +1,11 @@
 import abc
-from typing import Any
+import itertools
+from array import array
+from typing import Any, Iterable, Iterator, NamedTuple, Sequence, TypeAlias
 from pydantic import BaseModel
 
+from .errors import InsufficientContainersError
+
 
 class CustomFieldsMixin(BaseModel):
     """
@@ -19,18 +23,77 @@ class Container(CustomFieldsMixin):
 
 class ContainerSpec(BaseModel):
     container: Container
-    max_amount: int
+    max_amount: int | None = None  # None means as many as needed
+
+    def iter_containers(self) -> Iterator[Container]:
+        """
+        Lazily yield containers based on the specification.
+        """
+        amount = (
+            itertools.count() if self.max_amount is None else range(self.max_amount)
+        )
+        for _ in amount:
+            yield self.container.model_copy()
 
     def generate_containers(self) -> list[Container]:
         """
         Generate a list of containers based on the specification.
         """
-        return [self.container.model_copy() for i in range(self.max_amount)]
+        if self.max_amount is None:
+            raise ValueError("Cannot generate an unbounded amount of containers.")
+        return list(self.iter_containers())
+
+
+class ContainerSupply:
+    """
+    Containers handed out on demand.
+
+    Wraps a list of containers or a `ContainerSpec` and only materialises a
+    container when a layouter first asks for its index, so layout cost scales
+    with the number of containers actually used.
+    """
+
+    def __init__(self, containers: Iterable[Container]):
+        self._source = iter(containers)
+        self._items: list[Container] = []
+
+    @classmethod
+    def of(
+        cls, available: "list[Container] | ContainerSpec | ContainerSupply"
+    ) -> "ContainerSupply":
+        if isinstance(available, ContainerSupply):
+            return available
+        if isinstance(available, ContainerSpec):
+            return cls(available.iter_containers())
+        return cls(available)
+
+    def has(self, index: int) -> bool:
+        """Return True if a container exists at `index`, materialising up to it."""
+        while len(self._items) <= index:
+            container = next(self._source, None)
+            if container is None:
+                return False
+            self._items.append(container)
+        return True
+
+    def __getitem__(self, index: int) -> Container:
+        if not self.has(index):
+            raise InsufficientContainersError("Not enough containers to fit all boxes.")
+        return self._items[index]
+
+    def used(self, count: int) -> list[Container]:
+        """Return the first `count` containers."""
+        if count and not self.has(count - 1):
+            raise InsufficientContainersError("Not enough containers to fit all boxes.")
+        return self._items[:count]
 
 
 class Box(CustomFieldsMixin):
     width: float
     height: float
+    # Copies to place. Only `GangRunLayouter` reads this; the other layouters
+    # place every box once.
+    quantity: int = 1
 
 
 class AppliedBox(BaseModel):
@@ -48,24 +111,190 @@ class AppliedBox(BaseModel):
     mirror_vertical: bool = False
 
 
+class Placement(NamedTuple):
+    """Read-only placement, with the same attributes as `AppliedBox`."""
+
+    box_index: int
+    container_index: int
+    position: tuple[float, float]
+    scale: float
+    rotation: float
+    mirror_horizontal: bool
+    mirror_vertical: bool
+
+
 class LayoutResult(CustomFieldsMixin):
     used_containers: list[Container]
     applied_boxes: list[AppliedBox]
 
+    @property
+    def placement_count(self) -> int:
+        return len(self.applied_boxes)
+
+    def iter_placements(self) -> Iterator[AppliedBox]:
+        return iter(self.applied_boxes)
+
+    def remap_boxes(self, order: Sequence[int]) -> None:
+        """Replace every box index `i` with `order[i]`."""
+        for ab in self.applied_boxes:
+            ab.box_index = order[ab.box_index]
+
+    def to_result(self) -> "LayoutResult":
+        return self
+
+
+_MIRROR_H = 1
+_MIRROR_V = 2
+
+
+class CompactLayoutResult:
+    """
+    A layout result that stores placements as typed arrays, one per
+    `AppliedBox` field, instead of one model per placement.
+
+    Renderers read it through `iter_placements`. Code that needs the models
+    can use `applied_boxes`, which builds them on first access; from then on
+    that list is what the result holds, so changes to it are kept.
+    `to_result` converts to a regular `LayoutResult`.
+    """
+
+    def __init__(
+        self,
+        used_containers: list[Container],
+        custom_fields: dict[str, Any] | None = None,
+    ):
+        self.used_containers = used_containers
+        self.custom_fields = custom_fields if custom_fields is not None else {}
+        self.box_index = array("q")
+        self.container_index = array("q")
+        self.x = array("d")
+        self.y = array("d")
+        self.scale = array("d")
+        self.rotation = array("d")
+        self.mirror = array("B")
+        self._applied_boxes: list[AppliedBox] | None = None
+
+    def append(
+        self,
+        box_index: int,
+        container_index: int,
+        position: tuple[float, float],
+        scale: float = 1.0,
+        rotation: float = 0.0,
+        mirror_horizontal: bool = False,
+        mirror_vertical: bool = False,
+    ) -> None:
+        self.box_index.append(box_index)
+        self.container_index.append(container_index)
+        self.x.append(position[0])
+        self.y.append(position[1])
+        self.scale.append(scale)
+        self.rotation.append(rotation)
+        self.mirror.append(
+            (_MIRROR_H if mirror_horizontal else 0)
+            | (_MIRROR_V if mirror_vertical else 0)
+        )
+
+    @classmethod
+    def from_result(cls, result: "LayoutResult | CompactLayoutResult"):
+        if isinstance(result, CompactLayoutResult):
+            return result
+        compact = cls(result.used_containers, result.custom_fields)
+        for ab in result.applied_boxes:
+            compact.append(
+                ab.box_index,
+                ab.container_index,
+                ab.position,
+                ab.scale,
+                ab.rotation,
+                ab.mirror_horizontal,
+                ab.mirror_vertical,
+            )
+        return compact
+
+    @property
+    def placement_count(self) -> int:
+        if self._applied_boxes is not None:
+            return len(self._applied_boxes)
+        return len(self.box_index)
+
+    def iter_placements(self) -> Iterator[Placement | AppliedBox]:
+        if self._applied_boxes is not None:
+            yield from self._applied_boxes
+            return
+        for bi, ci, x, y, scale, rotation, mirror in zip(
+            self.box_index,
+            self.container_index,
+            self.x,
+            self.y,
+            self.scale,
+            self.rotation,
+            self.mirror,
+        ):
+            yield Placement(
+                bi,
+                ci,
+                (x, y),
+                scale,
+                rotation,
+                bool(mirror & _MIRROR_H),
+                bool(mirror & _MIRROR_V),
+            )
+
+    @property
+    def applied_boxes(self) -> list[AppliedBox]:
+        if self._applied_boxes is None:
+            self._applied_boxes = [
+                AppliedBox(**p._asdict()) for p in self.iter_placements()
+            ]
+        return self._applied_boxes
+
+    @applied_boxes.setter
+    def applied_boxes(self, applied_boxes: list[AppliedBox]) -> None:
+        self._applied_boxes = applied_boxes
+
+    def remap_boxes(self, order: Sequence[int]) -> None:
+        """Replace every box index `i` with `order[i]`."""
+        if self._applied_boxes is not None:
+            for ab in self._applied_boxes:
+                ab.box_index = order[ab.box_index]
+        else:
+            self.box_index = array("q", [order[i] for i in self.box_index])
+
+    def to_result(self) -> LayoutResult:
+        return LayoutResult(
+            used_containers=self.used_containers,
+            applied_boxes=[AppliedBox(**p._asdict()) for p in self.iter_placements()]
+            if self._applied_boxes is None
+            else self._applied_boxes,
+            custom_fields=self.custom_fields,
+        )
+
+
+AnyLayoutResult: TypeAlias = LayoutResult | CompactLayoutResult
+
 
 class BaseLayouter(abc.ABC):
+    # False for layouters that treat boxes by size rather than by position in
+    # the list, which lets the layout cache reuse results for reordered boxes.
+    order_sensitive: bool = True
+
     @abc.abstractmethod
     def perform_layout(
-        self, available_containers: list[Container] | ContainerSpec, boxes: list[Box]
-    ) -> LayoutResult:
+        self,
+        available_containers: list[Container] | ContainerSpec | ContainerSupply,
+        boxes: list[Box],
+    ) -> AnyLayoutResult:
         """
         Perform layout on the given boxes using the available containers.
 
         Args:
-            available_containers: List of containers or a container specification.
+            available_containers: List of containers, a container specification,
+                or a supply that hands containers out on demand.
             boxes: List of boxes to be laid out.
 
         Returns:
-            LayoutResult containing the layout information.
+            LayoutResult (or CompactLayoutResult, for large uniform layouts)
+            containing the layout information.
         """
         raise NotImplementedError("Subclasses must implement this method.")
@@ -3,7 +3,14 @@ TODO: Make these usuable
 """
 
 from .algorithms import GridLayouter
-from .models import BaseLayouter, Box, Container, ContainerSpec, LayoutResult
+from .models import (
+    BaseLayouter,
+    Box,
+    Container,
+    ContainerSpec,
+    ContainerSupply,
+    LayoutResult,
+)
 from .helpers import quarter_fold_order, saddle_order
 
 
@@ -36,7 +43,7 @@ class SignatureLayouter(BaseLayouter):
     # ------------------------------------------------------------
     def perform_layout(
         self,
-        available_containers: list[Container] | ContainerSpec,
+        available_containers: list[Container] | ContainerSpec | ContainerSupply,
         boxes: list[Box],
     ) -> LayoutResult:
         pages = list(boxes)
@@ -73,7 +80,7 @@ class QuarterFoldLayouter(BaseLayouter):
 
     def perform_layout(
         self,
-        available_containers: list[Container] | ContainerSpec,
+        available_containers: list[Container] | ContainerSpec | ContainerSupply,
         boxes: list[Box],
     ) -> LayoutResult:
         pages = list(boxes)
@@ -0,0 +1,377 @@
+"""
+Free-space bookkeeping for a single container, used by the packing layouters.
+
+Every bin works in its own coordinate system with the origin at the bottom-left
+corner of the usable area. Boxes are passed in already grown by the gap, so
+bins never have to know about padding or gaps.
+"""
+
+import abc
+import bisect
+import itertools
+from typing import Any, Iterator, NamedTuple
+
+from .spatial import Rect, RectIndex
+
+EPS = 1e-9
+
+
+class Fit(NamedTuple):
+    """A candidate position for a box in a bin; lower scores are better."""
+
+    score: tuple[float, ...]
+    x: float
+    y: float
+    rotated: bool
+    slot: Any = None  # bin-specific detail needed by `place`
+
+
+def _orientations(w: float, h: float, rotate: bool):
+    yield False, w, h
+    if rotate and w != h:
+        yield True, h, w
+
+
+class PackingBin(abc.ABC):
+    def __init__(self, width: float, height: float):
+        self.width = width
+        self.height = height
+        self.free_area = width * height  # kept up to date by the layouter
+
+    def capacity(self) -> float:
+        """Upper bound on the area of a box that still fits."""
+        return self.free_area
+
+    @abc.abstractmethod
+    def find(self, w: float, h: float, rotate: bool) -> Fit | None:
+        """Return the best position for a w x h box, or None if it does not fit."""
+
+    @abc.abstractmethod
+    def place(self, fit: Fit, w: float, h: float) -> None:
+        """Occupy the space for a w x h box (size after rotation) at `fit`."""
+
+
+class MaxRectsBin(PackingBin):
+    """
+    Keeps every maximal free rectangle, which may overlap each other.
+
+    Heuristics:
+        bssf: best short side fit - smallest leftover on the shorter side
+        baf: best area fit - smallest free rectangle that holds the box
+        bl: bottom-left - lowest top edge, then leftmost
+        contact: contact point - touch as much of the edges and boxes as possible
+    """
+
+    HEURISTICS = ("bssf", "baf", "bl", "contact")
+
+    def __init__(self, width: float, height: float, heuristic: str = "bssf"):
+        if heuristic not in self.HEURISTICS:
+            raise ValueError(f"Unknown MaxRects heuristic {heuristic!r}.")
+        super().__init__(width, height)
+        self.heuristic = heuristic
+        self.free: list[Rect] = [(0.0, 0.0, width, height)]
+        # placed boxes, indexed once the first (largest) box sets the cell size
+        self.used: RectIndex | None = None
+
+    def capacity(self) -> float:
+        return max((fw * fh for _, _, fw, fh in self.free), default=0.0)
+
+    def _contact(self, x: float, y: float, w: float, h: float) -> float:
+        score = 0.0
+        if x <= EPS or x + w >= self.width - EPS:
+            score += h
+        if y <= EPS or y + h >= self.height - EPS:
+            score += w
+        if self.used is None:
+            return score
+        for ux, uy, uw, uh in self.used.near(x, y, w, h, EPS):
+            if abs(ux - (x + w)) <= EPS or abs(ux + uw - x) <= EPS:
+                score += max(0.0, min(uy + uh, y + h) - max(uy, y))
+            if abs(uy - (y + h)) <= EPS or abs(uy + uh - y) <= EPS:
+                score += max(0.0, min(ux + uw, x + w) - max(ux, x))
+        return score
+
+    def _score(self, free: Rect, w: float, h: float) -> tuple[float, ...]:
+        fx, fy, fw, fh = free
+        short, long = sorted((fw - w, fh - h))
+        if self.heuristic == "bssf":
+            return (short, long)
+        if self.heuristic == "baf":
+            return (fw * fh - w * h, short)
+        if self.heuristic == "bl":
+            return (fy + h, fx)
+        return (-self._contact(fx, fy, w, h), fy, fx)
+
+    def find(self, w: float, h: float, rotate: bool) -> Fit | None:
+        best: Fit | None = None
+        for free in self.free:
+            for rotated, rw, rh in _orientations(w, h, rotate):
+                if rw <= free[2] + EPS and rh <= free[3] + EPS:
+                    score = self._score(free, rw, rh)
+                    if best is None or score < best.score:
+                        best = Fit(score, free[0], free[1], rotated)
+        return best
+
+    def place(self, fit: Fit, w: float, h: float) -> None:
+        x, y = fit.x, fit.y
+        kept: list[Rect] = []
+        split: list[Rect] = []
+
+        for free in self.free:
+            fx, fy, fw, fh = free
+            if x >= fx + fw or x + w <= fx or y >= fy + fh or y + h <= fy:
+                kept.append(free)
+                continue
+            # keep the parts of the free rectangle around the placed box
+            if x > fx:
+                split.append((fx, fy, x - fx, fh))
+            if x + w < fx + fw:
+                split.append((x + w, fy, fx + fw - x - w, fh))
+            if y > fy:
+                split.append((fx, fy, fw, y - fy))
+            if y + h < fy + fh:
+                split.append((fx, y + h, fw, fy + fh - y - h))
+
+        # Drop slivers and pieces contained in another free rectangle. The
+        # untouched rectangles were maximal already, so only the new pieces
+        # need checking.
+        split = [r for r in split if r[2] > EPS and r[3] > EPS]
+        split.sort(key=lambda r: r[2] * r[3], reverse=True)
+        new: list[Rect] = []
+        for r in split:
+            x0, y0 = r[0] + EPS, r[1] + EPS
+            x1, y1 = r[0] + r[2] - EPS, r[1] + r[3] - EPS
+            if not any(
+                x0 >= k[0] and y0 >= k[1] and x1 <= k[0] + k[2] and y1 <= k[1] + k[3]
+                for k in itertools.chain(new, kept)
+            ):
+                new.append(r)
+
+        self.free = kept + new
+        if self.used is None:
+            self.used = RectIndex(max(w, h))
+        self.used.add((x, y, w, h))
+
+
+class GuillotineBin(PackingBin):
+    """
+    Splits free space with edge-to-edge cuts only, so every sheet can be cut
+    apart on a guillotine.
+
+    Boxes go into the free rectangle they fill best (smallest leftover area),
+    and the leftover is split along its shorter axis. `cuts` records the
+    resulting cut lines as (axis, position, start, end) in the order they
+    have to be made.
+    """
+
+    def __init__(self, width: float, height: float):
+        super().__init__(width, height)
+        self.free: list[Rect] = [(0.0, 0.0, width, height)]
+        self.cuts: list[tuple[str, float, float, float]] = []
+
+    def capacity(self) -> float:
+        return max((fw * fh for _, _, fw, fh in self.free), default=0.0)
+
+    def find(self, w: float, h: float, rotate: bool) -> Fit | None:
+        best: Fit | None = None
+        for i, (fx, fy, fw, fh) in enumerate(self.free):
+            for rotated, rw, rh in _orientations(w, h, rotate):
+                if rw <= fw + EPS and rh <= fh + EPS:
+                    score = (fw * fh - rw * rh, min(fw - rw, fh - rh))
+                    if best is None or score < best.score:
+                        best = Fit(score, fx, fy, rotated, i)
+        return best
+
+    def place(self, fit: Fit, w: float, h: float) -> None:
+        fx, fy, fw, fh = self.free.pop(fit.slot)
+        right_w, top_h = fw - w, fh - h
+
+        x_cut = ("x", fx + w, fy, fy + h)
+        y_cut = ("y", fy + h, fx, fx + w)
+        if right_w <= top_h:
+            # full-width cut above the box, then a short one to its right
+            right = (fx + w, fy, right_w, h)
+            top = (fx, fy + h, fw, top_h)
+            y_cut = ("y", fy + h, fx, fx + fw)
+            cuts = [y_cut, x_cut]
+        else:
+            # full-height cut right of the box, then a short one above it
+            right = (fx + w, fy, right_w, fh)
+            top = (fx, fy + h, w, top_h)
+            x_cut = ("x", fx + w, fy, fy + fh)
+            cuts = [x_cut, y_cut]
+
+        for rect in (right, top):
+            if rect[2] > EPS and rect[3] > EPS:
+                self.free.append(rect)
+        for cut in cuts:
+            # without a leftover on that side the cut was made already
+            if (right_w if cut is x_cut else top_h) > EPS:
+                self.cuts.append(cut)
+
+
+class SkylineBin(PackingBin):
+    """
+    Tracks only the upper outline of the placed boxes, as (x, y, width)
+    segments, and puts each box where its top ends up lowest (bottom-left).
+    Space below the outline is never reused, which makes it fast and
+    predictable for boxes of similar height.
+    """
+
+    def __init__(self, width: float, height: float):
+        super().__init__(width, height)
+        self.skyline: list[list[float]] = [[0.0, 0.0, width]]
+
+    def capacity(self) -> float:
+        # largest rectangle above the skyline, as the largest rectangle in the
+        # histogram of free heights: a stack of (start x, free height) with
+        # increasing heights, popped when a lower segment closes them off
+        best = 0.0
+        stack: list[tuple[float, float]] = []
+        for x, y, _ in [*self.skyline, (self.width, self.height, 0.0)]:
+            free = self.height - y
+            start = x
+            while stack and stack[-1][1] >= free:
+                start, height = stack.pop()
+                best = max(best, (x - start) * height)
+            stack.append((start, free))
+        return best
+
+    def _fit_at(self, i: int, w: float, h: float) -> float | None:
+        """Return the y at which a w-wide box rests on segment `i`, if it fits."""
+        x = self.skyline[i][0]
+        if x + w > self.width + EPS:
+            return None
+
+        y = 0.0
+        remaining = w
+        j = i
+        while remaining > EPS:
+            if j == len(self.skyline):
+                return None
+            y = max(y, self.skyline[j][1])
+            if y + h > self.height + EPS:
+                return None
+            remaining -= self.skyline[j][2]
+            j += 1
+        return y
+
+    def find(self, w: float, h: float, rotate: bool) -> Fit | None:
+        best: Fit | None = None
+        for i, (sx, _, sw) in enumerate(self.skyline):
+            for rotated, rw, rh in _orientations(w, h, rotate):
+                y = self._fit_at(i, rw, rh)
+                if y is not None:
+                    score = (y + rh, sw)
+                    if best is None or score < best.score:
+                        best = Fit(score, sx, y, rotated, i)
+        return best
+
+    def place(self, fit: Fit, w: float, h: float) -> None:
+        i = fit.slot
+        x, top = fit.x, fit.y + h
+        self.skyline.insert(i, [x, top, w])
+
+        # cut back the segments now covered by the box
+        j = i + 1
+        while j < len(self.skyline):
+            seg = self.skyline[j]
+            overlap = x + w - seg[0]
+            if overlap <= EPS:
+                break
+            if overlap >= seg[2] - EPS:
+                del self.skyline[j]
+            else:
+                seg[0] += overlap
+                seg[2] -= overlap
+                break
+
+        # merge neighbours of equal height
+        j = 0
+        while j < len(self.skyline) - 1:
+            a, b = self.skyline[j], self.skyline[j + 1]
+            if abs(a[1] - b[1]) <= EPS:
+                a[2] += b[2]
+                del self.skyline[j + 1]
+            else:
+                j += 1
+
+
+class FirstFitIndex:
+    """
+    Max segment tree over the capacity of the open bins, in opening order.
+
+    `candidates` yields, from left to right, only the bins with enough
+    capacity for a box, each in O(log n) instead of trying every open bin.
+    """
+
+    def __init__(self):
+        self._size = 1
+        self._tree = [0.0, 0.0]
+        self._count = 0
+
+    def add(self, capacity: float) -> None:
+        if self._count == self._size:
+            leaves = self._tree[self._size :]
+            self._size *= 2
+            self._tree = [0.0] * self._size + leaves + [0.0] * len(leaves)
+            for node in range(self._size - 1, 0, -1):
+                self._tree[node] = max(self._tree[2 * node], self._tree[2 * node + 1])
+        self._count += 1
+        self.update(self._count - 1, capacity)
+
+    def update(self, index: int, capacity: float) -> None:
+        node = index + self._size
+        self._tree[node] = capacity
+        node //= 2
+        while node:
+            self._tree[node] = max(self._tree[2 * node], self._tree[2 * node + 1])
+            node //= 2
+
+    def _first(self, start: int, area: float, node: int, lo: int, hi: int) -> int:
+        """Leftmost bin >= `start` under `node` with capacity >= `area`, or -1."""
+        if hi <= start or lo >= self._count or self._tree[node] < area:
+            return -1
+        if hi - lo == 1:
+            return lo
+        mid = (lo + hi) // 2
+        found = self._first(start, area, 2 * node, lo, mid)
+        if found < 0:
+            found = self._first(start, area, 2 * node + 1, mid, hi)
+        return found
+
+    def candidates(self, area: float) -> Iterator[int]:
+        index = self._first(0, area, 1, 0, self._size)
+        while index >= 0:
+            yield index
+            index = self._first(index + 1, area, 1, 0, self._size)
+
+
+class BestFitIndex:
+    """
+    Open bins sorted by capacity.
+
+    `candidates` yields the bins with enough capacity for a box, tightest
+    first, starting from a binary search instead of a scan.
+    """
+
+    def __init__(self):
+        self._keys: list[tuple[float, int]] = []
+        self._capacities: list[float] = []
+
+    def add(self, capacity: float) -> None:
+        self._capacities.append(capacity)
+        bisect.insort(self._keys, (capacity, len(self._capacities) - 1))
+
+    def update(self, index: int, capacity: float) -> None:
+        key = (self._capacities[index], index)
+        del self._keys[bisect.bisect_left(self._keys, key)]
+        self._capacities[index] = capacity
+        bisect.insort(self._keys, (capacity, index))
+
+    def candidates(self, area: float) -> Iterator[int]:
+        for pos in range(bisect.bisect_left(self._keys, (area, -1)), len(self._keys)):
+            yield self._keys[pos][1]
+
+
+BIN_INDEXES = {"first-fit": FirstFitIndex, "best-fit": BestFitIndex}
@@ -0,0 +1,279 @@
+"""
+Anytime search over several packers for the layout with the fewest sheets.
+"""
+
+import itertools
+import math
+import multiprocessing
+import queue
+import random
+import time
+from typing import Iterator
+
+from ..metrics import count
+from .algorithms import (
+    FreeSpaceLayouter,
+    GuillotineLayouter,
+    MaxRectsLayouter,
+    PackLayouter,
+    SkylineLayouter,
+)
+from .errors import InsufficientContainersError
+from .models import (
+    AnyLayoutResult,
+    BaseLayouter,
+    Box,
+    Container,
+    ContainerSpec,
+    ContainerSupply,
+)
+
+# Box orders tried by the portfolio, on top of random shuffles.
+BOX_ORDERS = {
+    "area": lambda b: b.width * b.height,
+    "perimeter": lambda b: b.width + b.height,
+    "max-side": lambda b: max(b.width, b.height),
+    "height": lambda b: b.height,
+    "width": lambda b: b.width,
+}
+
+Strategy = tuple[str, BaseLayouter, list[int] | None]
+
+
+def sheet_lower_bound(
+    container: Container,
+    boxes: list[Box],
+    padding: float = 0.0,
+    gap: float = 0.0,
+    leeway: float = 1.0,
+    allow_rotation: bool = True,
+) -> int:
+    """
+    Lower bound on the number of sheets any packing of `boxes` needs.
+
+    The larger of the total box area divided by the usable sheet area, and
+    the number of boxes too large to share a sheet with each other (more
+    than half the sheet in both directions, however they are turned).
+    """
+    if not boxes:
+        return 0
+
+    width = container.width - 2 * padding + leeway + gap
+    height = container.height - 2 * padding + leeway + gap
+
+    area = sum((b.width + gap) * (b.height + gap) for b in boxes)
+    by_area = math.ceil(area / (width * height) - 1e-9)
+
+    def large(w: float, h: float) -> bool:
+        return w > width / 2 and h > height / 2
+
+    by_size = sum(
+        1
+        for b in boxes
+        if large(b.width + gap, b.height + gap)
+        and (not allow_rotation or large(b.height + gap, b.width + gap))
+    )
+
+    return max(by_area, by_size)
+
+
+def _run(
+    layouter: BaseLayouter,
+    available_containers: list[Container] | ContainerSpec,
+    boxes: list[Box],
+) -> AnyLayoutResult | None:
+    try:
+        return layouter.perform_layout(available_containers, boxes)
+    except InsufficientContainersError:
+        return None
+
+
+class PortfolioLayouter(BaseLayouter):
+    """
+    Run many packers, box orders and bin selections within a time budget and
+    keep the layout that uses the fewest sheets.
+
+    Strategies are tried from the most to the least promising: every packer
+    on boxes sorted largest first, then in other orders and with best-fit bin
+    selection, then on random shuffles until the budget runs out. The search
+    stops early once a layout reaches the sheet lower bound.
+
+    With `jobs` > 1 the strategies run in a process pool, and the workers
+    still running strategies when the budget is spent are terminated.
+
+    The search always returns at least one layout: if no strategy has finished
+    when the budget is spent, the first one is run to completion (in this
+    process, with `jobs` > 1).
+
+    The result records the lower bound on the sheet count and the strategy
+    that won in its custom fields.
+    """
+
+    def __init__(
+        self,
+        padding: float = 0.0,
+        gap: float = 0.0,
+        leeway: float = 1.0,
+        allow_rotation: bool = True,
+        time_budget: float = 5.0,
+        jobs: int = 1,
+        seed: int = 0,
+    ):
+        self.padding = padding
+        self.gap = gap
+        self.leeway = leeway
+        self.allow_rotation = allow_rotation
+        self.time_budget = time_budget
+        self.jobs = jobs
+        self.seed = seed
+
+    def _packers(self, bin_selection: str) -> Iterator[tuple[str, FreeSpaceLayouter]]:
+        params = {
+            "padding": self.padding,
+            "gap": self.gap,
+            "leeway": self.leeway,
+            "allow_rotation": self.allow_rotation,
+            "bin_selection": bin_selection,
+            "sort_boxes": False,
+        }
+        for heuristic in ("bssf", "baf", "bl", "contact"):
+            yield (
+                f"maxrects-{heuristic}",
+                MaxRectsLayouter(heuristic=heuristic, **params),
+            )
+        yield "guillotine", GuillotineLayouter(**params)
+        yield "skyline", SkylineLayouter(**params)
+
+    def _strategies(self, boxes: list[Box]) -> Iterator[Strategy]:
+        """Yield (label, layouter, box order) in the order they are tried."""
+        indices = range(len(boxes))
+
+        if self.allow_rotation:
+            yield (
+                "bottom-left",
+                PackLayouter(padding=self.padding, gap=self.gap, leeway=self.leeway),
+                None,
+            )
+
+        for bin_selection in ("first-fit", "best-fit"):
+            for order_name, key in BOX_ORDERS.items():
+                order = sorted(indices, key=lambda i: key(boxes[i]), reverse=True)
+                for name, layouter in self._packers(bin_selection):
+                    yield f"{name}/{bin_selection}/{order_name}", layouter, order
+
+        rng = random.Random(self.seed)
+        for round_no in itertools.count(1):
+            order = list(indices)
+            rng.shuffle(order)
+            for bin_selection in ("first-fit", "best-fit"):
+                for name, layouter in self._packers(bin_selection):
+                    label = f"{name}/{bin_selection}/shuffle-{round_no}"
+                    yield label, layouter, order
+
+    @staticmethod
+    def _remap(result: AnyLayoutResult, order: list[int] | None) -> AnyLayoutResult:
+        if order is not None:
+            result.remap_boxes(order)
+        return result
+
+    def perform_layout(
+        self,
+        available_containers: list[Container] | ContainerSpec | ContainerSupply,
+        boxes: list[Box],
+    ) -> AnyLayoutResult:
+        if isinstance(available_containers, ContainerSupply):
+            raise TypeError(
+                "PortfolioLayouter runs every strategy on its own containers; "
+                "pass a list of containers or a ContainerSpec."
+            )
+
+        containers = ContainerSupply.of(available_containers)
+        if not containers.has(0):
+            raise InsufficientContainersError("No containers available.")
+
+        lower_bound = sheet_lower_bound(
+            containers[0],
+            boxes,
+            self.padding,
+            self.gap,
+            self.leeway,
+            self.allow_rotation,
+        )
+        deadline = time.monotonic() + self.time_budget
+
+        best: tuple[int, str, AnyLayoutResult] | None = None
+        tried = 0
+
+        def consider(label: str, result: AnyLayoutResult | None, order) -> None:
+            nonlocal best, tried
+            tried += 1
+            if result is None:
+                return
+            sheets = len(result.used_containers)
+            if best is None or sheets < best[0]:
+                best = (sheets, label, self._remap(result, order))
+
+        def done() -> bool:
+            if best is not None and best[0] <= lower_bound:
+                return True
+            # past the deadline, but only once something has been tried
+            return tried > 0 and time.monotonic() >= deadline
+
+        strategies = self._strategies(boxes)
+
+        if self.jobs <= 1:
+            for label, layouter, order in strategies:
+                ordered = boxes if order is None else [boxes[i] for i in order]
+                consider(label, _run(layouter, available_containers, ordered), order)
+                if done():
+                    break
+        else:
+            # (label, order, result or exception) of each finished strategy
+            finished: queue.SimpleQueue = queue.SimpleQueue()
+            running = 0
+
+            # leaving the block terminates the workers, stopping strategies
+            # that are still running
+            with multiprocessing.Pool(self.jobs) as pool:
+                while True:
+                    while running < self.jobs and not done():
+                        label, layouter, order = next(strategies)
+                        ordered = boxes if order is None else [boxes[i] for i in order]
+                        pool.apply_async(
+                            _run,
+                            (layouter, available_containers, ordered),
+                            callback=lambda r, s=(label, order): finished.put((*s, r)),
+                            error_callback=lambda e: finished.put((None, None, e)),
+                        )
+                        running += 1
+
+                    if done() or not running:
+                        break
+
+                    try:
+                        label, order, result = finished.get(
+                            timeout=max(deadline - time.monotonic(), 0)
+                        )
+                    except queue.Empty:
+                        break  # budget spent
+
+                    running -= 1
+                    if isinstance(result, BaseException):
+                        raise result
+                    consider(label, result, order)
+
+            if not tried:
+                label, layouter, order = next(self._strategies(boxes))
+                ordered = boxes if order is None else [boxes[i] for i in order]
+                consider(label, _run(layouter, available_containers, ordered), order)
+
+        if best is None:
+            raise InsufficientContainersError("No strategy could fit all boxes.")
+
+        _, label, result = best
+        count("layout_strategies", tried)
+        count("sheets_lower_bound", lower_bound)
+
+        result.custom_fields["sheet_lower_bound"] = lower_bound
+        result.custom_fields["strategy"] = label
+        return result
@@ -0,0 +1,70 @@
+"""
+Spatial lookups used by the packing layouters.
+"""
+
+import math
+from collections import defaultdict
+
+Rect = tuple[float, float, float, float]  # x, y, w, h
+
+
+class RectIndex:
+    """
+    Uniform grid index over placed rectangles.
+
+    Every rectangle is registered in the grid cells it covers, so testing a
+    candidate position only looks at rectangles in the nearby cells instead of
+    every rectangle placed so far.
+    """
+
+    def __init__(self, cell_size: float):
+        self.cell_size = max(float(cell_size), 1.0)
+        self._cells: dict[tuple[int, int], list[Rect]] = defaultdict(list)
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _span(self, lo: float, hi: float) -> range:
+        return range(
+            math.floor(lo / self.cell_size), math.floor(hi / self.cell_size) + 1
+        )
+
+    def add(self, rect: Rect) -> None:
+        x, y, w, h = rect
+        for cx in self._span(x, x + w):
+            for cy in self._span(y, y + h):
+                self._cells[cx, cy].append(rect)
+        self._count += 1
+
+    def collides(self, x: float, y: float, w: float, h: float, gap: float) -> bool:
+        """
+        Return True if a w x h rectangle at (x, y) comes closer than `gap` to
+        any indexed rectangle.
+        """
+        for cx in self._span(x - gap, x + w + gap):
+            for cy in self._span(y - gap, y + h + gap):
+                for px, py, pw, ph in self._cells.get((cx, cy), ()):
+                    if not (
+                        x >= px + pw + gap
+                        or px >= x + w + gap
+                        or y >= py + ph + gap
+                        or py >= y + h + gap
+                    ):
+                        return True
+        return False
+
+    def near(self, x: float, y: float, w: float, h: float, gap: float) -> set[Rect]:
+        """Return the indexed rectangles within `gap` of a w x h rectangle at (x, y)."""
+        found: set[Rect] = set()
+        for cx in self._span(x - gap, x + w + gap):
+            for cy in self._span(y - gap, y + h + gap):
+                for px, py, pw, ph in self._cells.get((cx, cy), ()):
+                    if not (
+                        x > px + pw + gap
+                        or px > x + w + gap
+                        or y > py + ph + gap
+                        or py > y + h + gap
+                    ):
+                        found.add((px, py, pw, ph))
+        return found
@@ -0,0 +1,78 @@
+"""
+Per-phase timings and counters for a run.
+
+Code records into the current `Metrics` through `phase` and `count`; the CLI
+decides whether (and how) to report them. Nothing is printed by default.
+"""
+
+import json
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+
+class Metrics:
+    """Accumulated wall-clock time per phase, plus named counters."""
+
+    def __init__(self):
+        self.timings: dict[str, float] = defaultdict(float)
+        self.counters: dict[str, int] = defaultdict(int)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time the enclosed block and add it to phase `name`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] += time.perf_counter() - start
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counters[name] += amount
+
+    def as_dict(self) -> dict[str, dict]:
+        return {
+            "timings": {name: round(t, 6) for name, t in self.timings.items()},
+            "counters": dict(self.counters),
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.as_dict(), indent=2)
+
+    def to_text(self) -> str:
+        lines = [f"{name:<12} {t * 1000:10.1f} ms" for name, t in self.timings.items()]
+        lines += [f"{name:<12} {n:10d}" for name, n in self.counters.items()]
+        return "\n".join(lines)
+
+
+_current = Metrics()
+
+
+def get_metrics() -> Metrics:
+    """Return the metrics of the current run."""
+    return _current
+
+
+def reset_metrics() -> Metrics:
+    """Start a fresh set of metrics and return it."""
+    global _current
+    _current = Metrics()
+    return _current
+
+
+def phase(name: str):
+    """Time a block as phase `name` of the current run."""
+    return _current.phase(name)
+
+
+def count(name: str, amount: int = 1) -> None:
+    """Add `amount` to counter `name` of the current run."""
+    _current.count(name, amount)
+
+
+def record_output(path: Path) -> None:
+    """Count a written output file and its size."""
+    count("files_out")
+    count("bytes_out", path.stat().st_size)
@@ -0,0 +1,166 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO
+
+from pypdf import PdfReader
+from pypdf._page import PageObject
+
+from .selection import PageSelection, input_path, page_at, page_count
+from .utils import gather_files
+
+
+@dataclass(frozen=True, slots=True)
+class PageRef:
+    """
+    Lightweight reference to a single page of a PDF file.
+
+    Only the page geometry is stored; the page content is loaded on demand
+    through a `PageSource`.
+    """
+
+    path: Path
+    index: int
+    width: float
+    height: float
+    rotation: int = 0
+
+
+def _page_ref(path: Path, index: int, page: PageObject) -> PageRef:
+    return PageRef(
+        path=path,
+        index=index,
+        width=float(page.mediabox.width),
+        height=float(page.mediabox.height),
+        rotation=int(page.get("/Rotate", 0)),
+    )
+
+
+def scan_page_refs(path: Path) -> list[PageRef]:
+    """Read the geometry of every page of `path`, without touching its content."""
+    path = Path(path).resolve()
+
+    with path.open("rb") as fh:
+        return [_page_ref(path, i, page) for i, page in enumerate(PdfReader(fh).pages)]
+
+
+class PageSource:
+    """
+    Open PDF inputs lazily and resolve `PageRef`s to pages when needed.
+
+    Scanning a file only walks the page tree to read the mediabox and rotation
+    of every page, so no content stream or resource is parsed until a page is
+    actually loaded.
+    """
+
+    def __init__(self):
+        self._readers: dict[Path, tuple[BinaryIO, PdfReader]] = {}
+        self._refs: dict[Path, list[PageRef]] = {}
+        self._pages: dict[tuple[Path, int], PageObject] = {}
+
+    def reader(self, path: Path) -> PdfReader:
+        """Return the (cached) reader for `path`."""
+        key = Path(path).resolve()
+        if key not in self._readers:
+            # Read from an open handle so only the objects we touch are loaded.
+            fh = key.open("rb")
+            self._readers[key] = (fh, PdfReader(fh))
+        return self._readers[key][1]
+
+    def scan(self, path: Path) -> list[PageRef]:
+        """Return references to every page of `path`, reading geometry only."""
+        key = Path(path).resolve()
+        if key not in self._refs:
+            self._refs[key] = scan_page_refs(key)
+        return self._refs[key]
+
+    def select(self, selection: PageSelection) -> list[PageRef]:
+        """
+        Return references to the selected pages, reading the geometry of those
+        pages only.
+        """
+        key = selection.path.resolve()
+        if key in self._refs:
+            refs = self._refs[key]
+            return [refs[i] for i in selection.indices(len(refs))]
+
+        indices = selection.indices(page_count(self.reader(key)))
+        return [_page_ref(key, i, self._page(key, i)) for i in indices]
+
+    def add_refs(self, path: Path, refs: list[PageRef]) -> None:
+        """Record references scanned elsewhere (e.g. in a worker process)."""
+        self._refs[Path(path).resolve()] = refs
+
+    def _page(self, path: Path, index: int) -> PageObject:
+        if path in self._refs:
+            # the whole file is in use, so list all its pages at once
+            return self.reader(path).pages[index]
+
+        if (path, index) not in self._pages:
+            self._pages[path, index] = page_at(self.reader(path), index)
+        return self._pages[path, index]
+
+    def load(self, ref: PageRef) -> PageObject:
+        """Resolve `ref` to the actual page object."""
+        return self._page(Path(ref.path).resolve(), ref.index)
+
+    def trim(self) -> None:
+        """
+        Drop the objects parsed from every open reader so far.
+
+        The readers and the pages looked up so far stay, so nothing but the
+        objects needed again is parsed on the next `load`.
+        """
+        for _, reader in self._readers.values():
+            reader.resolved_objects.clear()
+
+    def release(self, path: Path | None = None) -> None:
+        """Drop cached readers (all of them, or only the one for `path`)."""
+        if path is None:
+            keys = list(self._readers)
+        else:
+            keys = [Path(path).resolve()]
+
+        self._pages = {k: v for k, v in self._pages.items() if k[0] not in keys}
+        for key in keys:
+            fh, _ = self._readers.pop(key, (None, None))
+            if fh is not None:
+                fh.close()
+
+
+def gather_page_refs(
+    input_files: list[Path | PageSelection],
+    source: PageSource | None = None,
+    jobs: int = 1,
+) -> list[PageRef]:
+    """
+    Gather page references for all input files without loading page content.
+    Of a `PageSelection`, only the selected pages are read.
+
+    With `jobs` > 1, the files are scanned in that many worker processes; the
+    references are still returned in input order.
+    """
+    pdf_files = gather_files(input_files)
+
+    for pdf in pdf_files:
+        if not input_path(pdf).exists():
+            raise FileNotFoundError(f"File {input_path(pdf)} does not exist.")
+
+    source = source or PageSource()
+
+    if jobs > 1:
+        unique = list(
+            dict.fromkeys(pdf.resolve() for pdf in pdf_files if isinstance(pdf, Path))
+        )
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            for path, refs in zip(unique, pool.map(scan_page_refs, unique)):
+                source.add_refs(path, refs)
+
+    refs: list[PageRef] = []
+    for pdf_file in pdf_files:
+        if isinstance(pdf_file, PageSelection):
+            refs.extend(source.select(pdf_file))
+        else:
+            refs.extend(source.scan(pdf_file))
+
+    return refs
@@ -1,5 +1,7 @@
+import csv
+import json
 from pathlib import Path
-from typing import Iterator
+from typing import Any, Iterator
 
 
 def parse_blocks(path: Path) -> Iterator[list[str]]:
@@ -16,3 +18,64 @@ def parse_blocks(path: Path) -> Iterator[list[str]]:
                 buf.append(line)
         if buf:
             yield buf
+
+
+def parse_csv_records(path: Path) -> Iterator[dict[str, str]]:
+    """Yield the rows of a CSV file with a header row as {column: value} dicts."""
+    with path.open(encoding="utf-8-sig", newline="") as fh:
+        yield from csv.DictReader(fh)
+
+
+def parse_jsonl_records(path: Path) -> Iterator[dict[str, Any]]:
+    """Yield the objects of a JSON Lines file, one per line (ignoring blank lines)."""
+    with path.open(encoding="utf-8") as fh:
+        for line_no, line in enumerate(fh, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError(f"{path}:{line_no} is not a JSON object")
+            yield record
+
+
+def parse_records(path: Path) -> Iterator[dict[str, Any]]:
+    """Yield the records of a .csv or .jsonl (.ndjson) file, one at a time."""
+    suffix = path.suffix.lower()
+    if suffix == ".csv":
+        return parse_csv_records(path)
+    if suffix in (".jsonl", ".ndjson"):
+        return parse_jsonl_records(path)
+    raise ValueError(f"File {path} is not a .csv or .jsonl file.")
+
+
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(text: str) -> float:
+    """Parse a duration such as "5s", "500ms", "2m" or "1.5" (seconds) into seconds."""
+    value = text.strip().lower()
+    for unit in sorted(_DURATION_UNITS, key=len, reverse=True):
+        if value.endswith(unit):
+            return float(value[: -len(unit)]) * _DURATION_UNITS[unit]
+    return float(value)
+
+
+PageRange = tuple[int, int | None]  # first and last page, 1-based; None = to the end
+
+
+def parse_page_ranges(text: str) -> tuple[PageRange, ...]:
+    """Parse page ranges such as "100-140", "1,5-8" or "200-" (to the last page)."""
+    ranges = []
+    for part in text.split(","):
+        first, dash, last = (s.strip() for s in part.partition("-"))
+        try:
+            start = int(first) if first else 1
+            end = (int(last) if last else None) if dash else int(first)
+        except ValueError:
+            raise ValueError(f"{part.strip()!r} is not a page range like 100-140")
+
+        if start < 1 or (end is not None and end < start):
+            raise ValueError(f"{part.strip()!r} is not a page range like 100-140")
+        ranges.append((start, end))
+
+    return tuple(ranges)
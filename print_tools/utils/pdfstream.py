@@ -0,0 +1,446 @@
+"""
+Incremental PDF writing for jobs that do not fit in memory.
+"""
+
+import hashlib
+import io
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Callable, Sequence
+
+from pypdf import PdfReader
+from pypdf._page import PageObject
+from pypdf.generic import (
+    ArrayObject,
+    DecodedStreamObject,
+    DictionaryObject,
+    EncodedStreamObject,
+    FloatObject,
+    IndirectObject,
+    NameObject,
+    NullObject,
+    NumberObject,
+    PdfObject,
+    StreamObject,
+)
+
+from .selection import PageSelection, input_path, page_at, page_count
+
+CATALOG_NUM = 1
+PAGES_NUM = 2
+
+# Boxes that would otherwise clip a tile back to the original page area.
+_PAGE_BOXES = ("/CropBox", "/BleedBox", "/TrimBox", "/ArtBox")
+
+# Nesting of shared copies beyond which objects are copied without sharing,
+# so that long reference chains (e.g. article thread beads) do not run into
+# the recursion limit.
+_MAX_SHARED_DEPTH = 64
+
+Tile = tuple[float, float, float, float]
+
+
+def object_budget(reader: PdfReader) -> int:
+    """Upper bound on the number of objects that copying `reader` can write."""
+    size = reader.trailer.get("/Size")
+    if size is not None:
+        return int(size)
+
+    idnums = [i for entries in reader.xref.values() for i in entries]
+    idnums.extend(reader.xref_objStm)
+    return max(idnums, default=0) + 1
+
+
+def _is_annotation(obj: PdfObject) -> bool:
+    return isinstance(obj, DictionaryObject) and (
+        obj.get("/Type") == "/Annot" or ("/Subtype" in obj and "/Rect" in obj)
+    )
+
+
+@dataclass
+class StreamingPart:
+    """Objects written by a `StreamingPdfWriter` that has not been closed."""
+
+    offsets: dict[int, int]
+    kids: list[int]
+    next_number: int
+
+
+class StreamingPdfWriter:
+    """
+    Write pages to a PDF file as they are read from the inputs.
+
+    Every object reachable from an input page is renumbered and written to the
+    output straight away, so only the xref offsets and the list of page object
+    numbers are kept in memory. Stream data is copied verbatim, without being
+    decoded or re-encoded.
+
+    With `dedupe`, objects (fonts, images, ICC profiles, colour spaces,
+    forms, ...) are content-hashed across all inputs and identical ones are
+    written only once, with every reference pointed at the shared copy. Page
+    content streams are the exception: they are written as they are, so
+    that the hashes kept in memory grow with the number of distinct
+    resources rather than with the number of pages. Objects are shared
+    bottom-up, so two objects whose references lead to
+    identical objects are identical themselves, whatever numbers those
+    objects had in their inputs. Annotations, which belong to one page, are
+    never shared.
+
+    Document-level structures (outlines, forms, structure trees) of the inputs
+    are not carried over.
+    """
+
+    def __init__(
+        self,
+        fh: BinaryIO,
+        dedupe: bool = False,
+        *,
+        first_number: int = PAGES_NUM + 1,
+        header: bool = True,
+    ):
+        self._fh = fh
+        self.dedupe = dedupe
+        self._hashes: dict[bytes, int] = {}
+        self._in_progress: set[tuple[int, int]] = set()
+        self._depth = 0
+        self.deduplicated = 0
+        # object number -> file offset; 1 and 2 are reserved for the catalog
+        # and the page tree root, which are written on close.
+        self._offsets: dict[int, int] = {}
+        self._next_num = first_number
+        self._kids: list[int] = []
+        self._closed = False
+
+        if header:
+            self._fh.write(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
+
+    def __enter__(self) -> "StreamingPdfWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None and not self._closed:
+            self.close()
+
+    @property
+    def page_count(self) -> int:
+        return len(self._kids)
+
+    # --------------------------------------------------------------------- #
+    # object numbering and writing                                          #
+    # --------------------------------------------------------------------- #
+    def _reserve(self) -> int:
+        num = self._next_num
+        self._next_num += 1
+        return num
+
+    def _write_object(self, num: int, obj: PdfObject) -> None:
+        self._offsets[num] = self._fh.tell()
+        self._fh.write(f"{num} 0 obj\n".encode())
+        obj.write_to_stream(self._fh)
+        self._fh.write(b"\nendobj\n")
+
+    def _copy(
+        self,
+        obj: PdfObject,
+        mapping: dict[tuple[int, int], int],
+        queue: list[IndirectObject],
+    ) -> PdfObject:
+        """Return a copy of `obj` whose references point at output numbers."""
+        if isinstance(obj, IndirectObject):
+            key = (obj.idnum, obj.generation)
+            if key not in mapping:
+                target = obj.get_object()
+                if target is None or isinstance(target, NullObject):
+                    # Dangling reference; inline the null instead.
+                    return NullObject()
+                if isinstance(target, DictionaryObject) and target.get("/Type") in (
+                    "/Pages",
+                    "/Catalog",
+                ):
+                    # Stray links back into the source document structure are
+                    # pointed at our own page tree instead of copying it.
+                    mapping[key] = PAGES_NUM
+                elif (
+                    isinstance(target, DictionaryObject)
+                    and target.get("/Type") == "/Page"
+                ):
+                    # A page that is not being written (e.g. the target of a
+                    # link from a page range); copying it would pull in its
+                    # content and everything it links to.
+                    return NullObject()
+                elif key in self._in_progress:
+                    # Reference cycle; give up on sharing this object.
+                    mapping[key] = self._reserve()
+                elif (
+                    self.dedupe
+                    and self._depth < _MAX_SHARED_DEPTH
+                    and not _is_annotation(target)
+                ):
+                    mapping[key] = self._copy_shared(key, target, mapping, queue)
+                else:
+                    mapping[key] = self._reserve()
+                    queue.append(obj)
+            return IndirectObject(mapping[key], 0, None)
+
+        if isinstance(obj, StreamObject):
+            out = (
+                EncodedStreamObject()
+                if isinstance(obj, EncodedStreamObject)
+                else DecodedStreamObject()
+            )
+            out._data = obj._data
+            for k, v in obj.items():
+                out[k] = self._copy(v, mapping, queue)
+            return out
+
+        if isinstance(obj, DictionaryObject):
+            out = DictionaryObject()
+            for k, v in obj.items():
+                out[k] = self._copy(v, mapping, queue)
+            return out
+
+        if isinstance(obj, ArrayObject):
+            return ArrayObject(self._copy(v, mapping, queue) for v in obj)
+
+        return obj
+
+    def _copy_shared(
+        self,
+        key: tuple[int, int],
+        obj: PdfObject,
+        mapping: dict[tuple[int, int], int],
+        queue: list[IndirectObject],
+    ) -> int:
+        """
+        Write `obj` unless an identical object was written before, and return
+        the output number to reference.
+
+        Objects referenced by `obj` are shared first, so the output numbers in
+        the copy identify their content and the copy can be hashed as written
+        (e.g. a form is matched through its font dicts and their font files).
+        """
+        self._in_progress.add(key)
+        self._depth += 1
+        try:
+            out = self._copy(obj, mapping, queue)
+        finally:
+            self._depth -= 1
+            self._in_progress.discard(key)
+
+        if key in mapping:
+            # Numbered while resolving a cycle; it cannot be shared.
+            self._write_object(mapping[key], out)
+            return mapping[key]
+
+        buf = io.BytesIO()
+        if isinstance(out, StreamObject):
+            buf.write(b"stream\0")
+            DictionaryObject.write_to_stream(out, buf)
+            buf.write(b"\0" + out._data)
+        else:
+            buf.write(b"object\0")
+            out.write_to_stream(buf)
+        digest = hashlib.sha256(buf.getvalue()).digest()
+
+        if digest in self._hashes:
+            self.deduplicated += 1
+            return self._hashes[digest]
+
+        num = self._reserve()
+        self._hashes[digest] = num
+        self._write_object(num, out)
+        return num
+
+    def _copy_contents(
+        self,
+        contents: PdfObject,
+        mapping: dict[tuple[int, int], int],
+        queue: list[IndirectObject],
+    ) -> PdfObject:
+        """
+        Copy the /Contents of a page without sharing its content streams.
+
+        Page content is practically never repeated, so with `dedupe` hashing
+        it would only keep a digest per page in memory; the resources it
+        draws are shared as usual.
+        """
+        if isinstance(contents, ArrayObject):
+            return ArrayObject(self._copy_contents(v, mapping, queue) for v in contents)
+
+        if isinstance(contents, IndirectObject):
+            key = (contents.idnum, contents.generation)
+            target = contents.get_object()
+            if key not in mapping and isinstance(target, StreamObject):
+                mapping[key] = self._reserve()
+                queue.append(contents)
+            elif key not in mapping and isinstance(target, ArrayObject):
+                mapping[key] = self._reserve()
+                self._write_object(
+                    mapping[key], self._copy_contents(target, mapping, queue)
+                )
+
+        return self._copy(contents, mapping, queue)
+
+    def _drain(
+        self,
+        reader: PdfReader,
+        mapping: dict[tuple[int, int], int],
+        queue: list[IndirectObject],
+    ) -> None:
+        """Write every object waiting in `queue` (and what they reference)."""
+        while queue:
+            ref = queue.pop()
+            obj = reader.get_object(ref)
+            self._write_object(
+                mapping[(ref.idnum, ref.generation)],
+                self._copy(obj, mapping, queue) if obj is not None else NullObject(),
+            )
+
+    # --------------------------------------------------------------------- #
+    # public API                                                            #
+    # --------------------------------------------------------------------- #
+    def append(
+        self,
+        pdf: Path | PageSelection | PdfReader,
+        tiles: Callable[[PageObject], list[Tile]] | None = None,
+        indices: Sequence[int] | None = None,
+    ) -> None:
+        """
+        Append all pages of `pdf` to the output, or those at `indices`. Of a
+        `PageSelection`, the selected pages are appended. References to pages
+        that are not appended (e.g. link destinations) are written as null,
+        so no other page is copied.
+
+        `tiles` may map each source page to a list of (llx, lly, urx, ury)
+        rectangles. Every rectangle then becomes an output page with that
+        mediabox, and all of them share the source page's content and
+        resources, which are written only once.
+        """
+        if not isinstance(pdf, PdfReader):
+            # A path would make pypdf read the whole file into memory; reading
+            # from an open handle only touches the objects we ask for.
+            with open(input_path(pdf), "rb") as fh:
+                reader = PdfReader(fh)
+                if isinstance(pdf, PageSelection):
+                    indices = pdf.indices(page_count(reader))
+                return self.append(reader, tiles=tiles, indices=indices)
+
+        reader = pdf
+
+        mapping: dict[tuple[int, int], int] = {}
+        queue: list[IndirectObject] = []
+
+        if indices is None:
+            pages = reader.pages
+        else:
+            pages = [page_at(reader, i) for i in indices]
+        nums = []
+
+        # Number every page first so links between pages of the same input
+        # resolve to the copies.
+        for page in pages:
+            ref = page.indirect_reference
+            num = self._reserve()
+            mapping[(ref.idnum, ref.generation)] = num
+            nums.append(num)
+
+        for page, num in zip(pages, nums):
+            # Inherited attributes were pushed down onto the page when it was
+            # read from the page tree, so the parent can safely be replaced.
+            attrs = {k: v for k, v in page.items() if k != "/Parent"}
+            contents = attrs.pop("/Contents", None)
+            out = self._copy(DictionaryObject(attrs), mapping, queue)
+            out[NameObject("/Parent")] = IndirectObject(PAGES_NUM, 0, None)
+            if contents is not None:
+                out[NameObject("/Contents")] = self._copy_contents(
+                    contents, mapping, queue
+                )
+
+            if tiles is None:
+                self._write_object(num, out)
+                self._kids.append(num)
+            else:
+                for i, rect in enumerate(tiles(page)):
+                    tile = DictionaryObject(
+                        {k: v for k, v in out.items() if k not in _PAGE_BOXES}
+                    )
+                    tile[NameObject("/MediaBox")] = ArrayObject(
+                        FloatObject(v) for v in rect
+                    )
+                    # Links to the source page land on its first tile.
+                    tile_num = num if i == 0 else self._reserve()
+                    self._write_object(tile_num, tile)
+                    self._kids.append(tile_num)
+
+            self._drain(reader, mapping, queue)
+
+            # Objects are written already; keep only one page worth of parsed
+            # objects around.
+            reader.resolved_objects.clear()
+
+    def part(self) -> "StreamingPart":
+        """Describe what was written so far, for `append_part` on another writer."""
+        return StreamingPart(
+            offsets=dict(self._offsets),
+            kids=list(self._kids),
+            next_number=self._next_num,
+        )
+
+    def append_part(self, part: "StreamingPart", data: BinaryIO) -> None:
+        """
+        Copy objects written by another writer into the output.
+
+        `data` holds the bytes that writer produced (created with `header=False`
+        and a `first_number` that does not overlap with this writer's numbers).
+        """
+        start = self._fh.tell()
+        shutil.copyfileobj(data, self._fh)
+
+        self._offsets.update((num, start + off) for num, off in part.offsets.items())
+        self._kids.extend(part.kids)
+        self._next_num = max(self._next_num, part.next_number)
+
+    def close(self) -> None:
+        """Write the page tree, catalog, xref table and trailer."""
+        pages = DictionaryObject(
+            {
+                NameObject("/Type"): NameObject("/Pages"),
+                NameObject("/Kids"): ArrayObject(
+                    IndirectObject(num, 0, None) for num in self._kids
+                ),
+                NameObject("/Count"): NumberObject(len(self._kids)),
+            }
+        )
+        self._write_object(PAGES_NUM, pages)
+
+        catalog = DictionaryObject(
+            {
+                NameObject("/Type"): NameObject("/Catalog"),
+                NameObject("/Pages"): IndirectObject(PAGES_NUM, 0, None),
+            }
+        )
+        self._write_object(CATALOG_NUM, catalog)
+
+        size = self._next_num
+        xref_offset = self._fh.tell()
+        self._fh.write(f"xref\n0 {size}\n".encode())
+        self._fh.write(b"0000000000 65535 f\r\n")
+        for num in range(1, size):
+            offset = self._offsets.get(num)
+            if offset is None:
+                self._fh.write(b"0000000000 00000 f\r\n")
+            else:
+                self._fh.write(f"{offset:010d} 00000 n\r\n".encode())
+
+        trailer = DictionaryObject(
+            {
+                NameObject("/Size"): NumberObject(size),
+                NameObject("/Root"): IndirectObject(CATALOG_NUM, 0, None),
+            }
+        )
+        self._fh.write(b"trailer\n")
+        trailer.write_to_stream(self._fh)
+        self._fh.write(f"\nstartxref\n{xref_offset}\n%%EOF\n".encode())
+
+        self._closed = True
@@ -0,0 +1,133 @@
+"""
+Inputs restricted to some of their pages, written as ``book.pdf[100-140]``.
+"""
+
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+from pypdf import PdfReader
+from pypdf._page import PageObject
+from pypdf.generic import DictionaryObject, IndirectObject, NameObject
+
+from .parsing import PageRange, parse_page_ranges
+
+# Page attributes a page takes from its ancestors in the page tree.
+_INHERITABLE = ("/Resources", "/MediaBox", "/CropBox", "/Rotate")
+
+_SELECTOR = re.compile(r"(?P<path>.+)\[(?P<ranges>[^\[\]]*)\]")
+
+
+@dataclass(frozen=True, slots=True)
+class PageSelection:
+    """Some of the pages of a PDF file, as ranges of 1-based page numbers."""
+
+    path: Path
+    ranges: tuple[PageRange, ...]
+
+    def indices(self, page_count: int) -> list[int]:
+        """Return the 0-based indices of the selected pages, in selection order."""
+        indices: list[int] = []
+        for first, last in self.ranges:
+            last = page_count if last is None else last
+            if max(first, last) > page_count:
+                raise ValueError(
+                    f"{self.path} has {page_count} pages, "
+                    f"page {max(first, last)} cannot be selected."
+                )
+            indices.extend(range(first - 1, last))
+        return indices
+
+
+def parse_page_input(text: str) -> Path | PageSelection:
+    """
+    Parse an input argument: a path, or a path followed by page ranges in
+    brackets (`book.pdf[100-140]`, `book.pdf[1,5-8,200-]`). An existing file
+    whose name happens to end in brackets is taken as a plain path.
+    """
+    path = Path(text)
+    match = _SELECTOR.fullmatch(text)
+    if match is None or path.exists():
+        return path
+    return PageSelection(Path(match["path"]), parse_page_ranges(match["ranges"]))
+
+
+def input_path(pdf: Path | PageSelection) -> Path:
+    """The file an input refers to."""
+    return pdf.path if isinstance(pdf, PageSelection) else pdf
+
+
+def page_count(reader: PdfReader) -> int:
+    """Number of pages of `reader`, read from the page tree root if need be."""
+    if reader.flattened_pages is not None:
+        return len(reader.flattened_pages)
+    return int(reader.root_object["/Pages"]["/Count"])
+
+
+def _is_page_tree_node(node: DictionaryObject) -> bool:
+    if "/Type" in node:
+        return node["/Type"] == "/Pages"
+    return "/Kids" in node
+
+
+def page_at(reader: PdfReader, index: int) -> PageObject:
+    """
+    Return page `index` of `reader`.
+
+    Unless pypdf has listed the pages already, the page tree is descended by
+    the /Count of each subtree, so only the nodes on the way to the page are
+    parsed rather than every page of the document. A tree whose counts do not
+    add up is left to pypdf to list in full.
+    """
+    if reader.flattened_pages is not None:
+        return reader.pages[index]
+
+    node = reader.root_object["/Pages"].get_object()
+    inherit: dict[str, object] = {}
+    remaining = index
+    seen: set[int] = set()
+
+    while id(node) not in seen:
+        seen.add(id(node))
+        for attr in _INHERITABLE:
+            if attr in node:
+                inherit[attr] = node.raw_get(attr)
+
+        kids = node.get("/Kids", [])
+        if int(node.get("/Count", -1)) == len(kids) and remaining < len(kids):
+            # as many pages as kids: in practice every kid is a page, so the
+            # page can be picked without looking at the kids before it
+            kid = kids[remaining].get_object()
+            if not _is_page_tree_node(kid):
+                return _leaf_page(reader, kids[remaining], kid, inherit)
+
+        for ref in kids:
+            kid = ref.get_object()
+            if _is_page_tree_node(kid):
+                count = int(kid.get("/Count", 0))
+                if remaining < count:
+                    node = kid
+                    break
+                remaining -= count
+            elif remaining == 0:
+                return _leaf_page(reader, ref, kid, inherit)
+            else:
+                remaining -= 1
+        else:
+            break
+
+    return reader.pages[index]
+
+
+def _leaf_page(
+    reader: PdfReader,
+    ref: object,
+    node: DictionaryObject,
+    inherit: dict[str, object],
+) -> PageObject:
+    page = PageObject(reader, ref if isinstance(ref, IndirectObject) else None)
+    page.update(node)
+    for attr, value in inherit.items():
+        if attr not in page:
+            page[NameObject(attr)] = value
+    return page
@@ -2,7 +2,9 @@ from pathlib import Path
 from pypdf import PdfReader
 from pypdf._page import PageObject
 from reportlab.lib import colors
-from reportlab.pdfbase import pdfmetrics, ttfonts
+
+from .fonts import register_font  # noqa: F401
+from .selection import PageSelection, input_path, page_at, page_count
 
 
 def hex_to_colour(hexcode: str):
@@ -12,44 +14,59 @@ def hex_to_colour(hexcode: str):
     return colors.Color(r, g, b)
 
 
-def register_font(name: str):
-    """Register external TTF if given a filename; otherwise assume built-in."""
-    if Path(name).suffix.lower() in {".ttf", ".otf"}:
-        short = Path(name).stem
-        pdfmetrics.registerFont(ttfonts.TTFont(short, name))
-        return short
-    return name
-
+def gather_files(
+    input_files: list[Path | PageSelection], ext: str = ".pdf"
+) -> list[Path | PageSelection]:
+    """
+    Gather and validate input files, ensuring they are all PDF files.
 
-def gather_files(input_files: list[Path], ext: str = ".pdf") -> list[Path]:
-    """Gather and validate input files, ensuring they are all PDF files."""
+    Page selections are kept as they are; they must name a file, not a
+    directory.
+    """
     pdf_files = []
 
     for file in input_files:
-        if file.is_dir():
+        if isinstance(file, Path) and file.is_dir():
             # Add all files with the specified extension from the directory
             pdf_files.extend(list(file.glob(f"*{ext}")))
         else:
-            if file.suffix.lower() != ext:
-                raise ValueError(f"File {file} is not a {ext} file.")
+            if input_path(file).suffix.lower() != ext:
+                raise ValueError(f"File {input_path(file)} is not a {ext} file.")
 
             pdf_files.append(file)
 
     return pdf_files
 
 
-def gather_pdf_pages(input_files: list[Path]) -> list[PageObject]:
-    """Gather and validate input files, ensuring they are all PDF files."""
+def gather_pdf_pages(input_files: list[Path | PageSelection]) -> list[PageObject]:
+    """
+    Gather and validate input files, ensuring they are all PDF files.
+
+    Of a `PageSelection`, only the selected pages are parsed.
+    """
     pdf_files = gather_files(input_files)
 
     for pdf in pdf_files:
-        if not pdf.exists():
-            raise FileNotFoundError(f"File {pdf} does not exist.")
-        if pdf.suffix.lower() != ".pdf":
-            raise ValueError(f"File {pdf} is not a PDF file.")
+        if not input_path(pdf).exists():
+            raise FileNotFoundError(f"File {input_path(pdf)} does not exist.")
+        if input_path(pdf).suffix.lower() != ".pdf":
+            raise ValueError(f"File {input_path(pdf)} is not a PDF file.")
+
+    # Repeated inputs share one reader, so the same page object is reused and
+    # can be embedded once no matter how often it is placed.
+    readers: dict[Path, PdfReader] = {}
 
     pages: list[PageObject] = []
     for pdf_file in pdf_files:
-        pages.extend(PdfReader(pdf_file).pages)
+        key = input_path(pdf_file).resolve()
+        if key not in readers:
+            readers[key] = PdfReader(key)
+
+        reader = readers[key]
+        if isinstance(pdf_file, PageSelection):
+            indices = pdf_file.indices(page_count(reader))
+            pages.extend(page_at(reader, i) for i in indices)
+        else:
+            pages.extend(reader.pages)
 
     return pages
@@ -0,0 +1,43 @@
+import random
+
+from print_tools.utils.layouting.algorithms import PackLayouter
+from print_tools.utils.layouting.cache import CachedLayouter, LayoutCache
+from print_tools.utils.layouting.models import Box, Container, ContainerSpec
+from print_tools.utils.metrics import reset_metrics
+
+SIZES = [(60, 40), (30, 30), (100, 20), (45, 70), (20, 20), (80, 55)]
+
+
+def _placements(result, boxes: list[Box]) -> list[tuple]:
+    """Where each box was put, described by its size rather than its index."""
+    return sorted(
+        (
+            p.container_index,
+            tuple(p.position),
+            p.rotation,
+            (boxes[p.box_index].width, boxes[p.box_index].height),
+        )
+        for p in result.iter_placements()
+    )
+
+
+def test_hit_maps_boxes_back_to_callers_order():
+    rng = random.Random(3)
+    sizes = [rng.choice(SIZES) for _ in range(40)]
+    first = [Box(width=w, height=h) for w, h in sizes]
+    rng.shuffle(sizes)
+    second = [Box(width=w, height=h) for w, h in sizes]
+
+    layouter = CachedLayouter(PackLayouter(padding=5, gap=2), LayoutCache())
+    spec = ContainerSpec(container=Container(width=300, height=200))
+    metrics = reset_metrics()
+
+    expected = _placements(layouter.perform_layout(spec, first), first)
+    hit = layouter.perform_layout(spec, second)
+    again = layouter.perform_layout(spec, first)
+
+    assert metrics.counters["layout_cache_misses"] == 1
+    assert metrics.counters["layout_cache_hits"] == 2
+    assert sorted(p.box_index for p in hit.iter_placements()) == list(range(40))
+    assert _placements(hit, second) == expected
+    assert _placements(again, first) == expected
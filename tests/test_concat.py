@@ -0,0 +1,45 @@
+from pathlib import Path
+
+import pytest
+from pypdf import PdfReader
+from reportlab.lib.pagesizes import A6
+from reportlab.pdfgen import canvas
+
+from print_tools.core.concat import concat_pdfs
+
+
+def _document(path: Path, text: str) -> Path:
+    c = canvas.Canvas(str(path), pagesize=A6)
+    c.setFont("Helvetica", 12)
+    c.drawString(20, 380, text)
+    c.save()
+    return path
+
+
+def _fonts(path: Path) -> set[int]:
+    """Object numbers of the fonts the pages of `path` use."""
+    return {
+        ref.idnum
+        for page in PdfReader(path).pages
+        for ref in page["/Resources"]["/Font"].values()
+    }
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_dedupe_shares_fonts_across_inputs(tmp_path, jobs):
+    inputs = [_document(tmp_path / f"{i}.pdf", f"Document {i}") for i in range(3)]
+    output = tmp_path / "out.pdf"
+
+    concat_pdfs(inputs, output, streaming=True, dedupe=True, jobs=jobs)
+
+    assert len(PdfReader(output).pages) == 3
+    assert len(_fonts(output)) == 1
+
+
+def test_parallel_without_dedupe_keeps_fonts_apart(tmp_path):
+    inputs = [_document(tmp_path / f"{i}.pdf", f"Document {i}") for i in range(3)]
+    output = tmp_path / "out.pdf"
+
+    concat_pdfs(inputs, output, jobs=2)
+
+    assert len(_fonts(output)) == 3
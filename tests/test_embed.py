@@ -0,0 +1,70 @@
+import base64
+import io
+import zlib
+
+import pytest
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import (
+    ArrayObject,
+    DictionaryObject,
+    EncodedStreamObject,
+    NameObject,
+    NullObject,
+    NumberObject,
+)
+
+from print_tools.utils.embed import page_to_form_xobject
+
+CONTENT = b"0 0 1 rg 10 10 50 50 re f"
+
+
+def _page_with_contents(filters: list[str], parms) -> PdfReader:
+    data = zlib.compress(CONTENT)
+    if filters[0] == "/ASCII85Decode":
+        data = base64.a85encode(data) + b"~>"
+
+    contents = EncodedStreamObject()
+    contents._data = data
+    contents[NameObject("/Filter")] = ArrayObject(map(NameObject, filters))
+    if parms is not None:
+        contents[NameObject("/DecodeParms")] = parms
+
+    writer = PdfWriter()
+    page = writer.add_blank_page(width=100, height=100)
+    page[NameObject("/Contents")] = writer._add_object(contents)
+
+    buf = io.BytesIO()
+    writer.write(buf)
+    return PdfReader(buf)
+
+
+@pytest.mark.parametrize(
+    "parms",
+    [
+        None,
+        ArrayObject([NullObject(), NullObject()]),
+        DictionaryObject({NameObject("/Columns"): NumberObject(1)}),
+    ],
+)
+def test_form_from_ascii85_flate_contents(parms):
+    page = _page_with_contents(["/ASCII85Decode", "/FlateDecode"], parms)
+    writer = PdfWriter()
+
+    form = page_to_form_xobject(writer, page.pages[0]).get_object()
+
+    assert form["/Filter"] == ["/FlateDecode"]
+    assert "/DecodeParms" not in form
+    assert form.get_data() == CONTENT
+
+
+def test_form_keeps_parameters_of_remaining_filter():
+    parms = ArrayObject(
+        [NullObject(), DictionaryObject({NameObject("/Predictor"): NumberObject(1)})]
+    )
+    page = _page_with_contents(["/ASCII85Decode", "/FlateDecode"], parms)
+    writer = PdfWriter()
+
+    form = page_to_form_xobject(writer, page.pages[0]).get_object()
+
+    assert form["/DecodeParms"] == [{"/Predictor": 1}]
+    assert form.get_data() == CONTENT
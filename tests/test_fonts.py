@@ -0,0 +1,82 @@
+import random
+
+import pytest
+from reportlab.pdfbase import pdfmetrics
+
+from print_tools.utils.fonts import FONT_SIZE_STEP, fit_font_size, string_width
+
+FONTS = ["Helvetica", "Times-Bold", "Courier"]
+
+
+def _fits(lines, font, size, max_width, max_height, line_spacing) -> bool:
+    widest = max(
+        (pdfmetrics.stringWidth(line, font, size) for line in lines), default=0
+    )
+    if widest > max_width + 1e-9:
+        return False
+    height = size * len(lines) + line_spacing * (len(lines) - 1)
+    return max_height is None or height <= max_height + 1e-9
+
+
+def _expected(lines, font, max_size, max_width, max_height, line_spacing, min_size):
+    """The size a linear search down from `max_size` picks."""
+    size = max_size
+    while size >= min_size:
+        if _fits(lines, font, size, max_width, max_height, line_spacing):
+            return size
+        size -= FONT_SIZE_STEP
+    return min(min_size, max_size)
+
+
+def _random_line(rng: random.Random) -> str:
+    alphabet = "abcdefghijklmnopqrstuvwxyz ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789.,-éü"
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+
+
+def test_string_width_matches_reportlab():
+    rng = random.Random(1)
+    for _ in range(300):
+        text, font = _random_line(rng), rng.choice(FONTS)
+        size = rng.uniform(1, 30)
+        assert string_width(text, font, size) == pytest.approx(
+            pdfmetrics.stringWidth(text, font, size)
+        )
+
+
+def test_fit_font_size_matches_linear_search():
+    rng = random.Random(2)
+    for _ in range(3000):
+        lines = [_random_line(rng) for _ in range(rng.randint(0, 4))]
+        font = rng.choice(FONTS)
+        max_size = rng.choice([rng.randint(4, 40), round(rng.uniform(2, 40), 2)])
+        min_size = rng.choice([4.0, 0.5, round(rng.uniform(1, 12), 2)])
+        max_width = rng.uniform(10, 400)
+        max_height = rng.choice([None, rng.uniform(5, 150)])
+        line_spacing = rng.choice([0, 2, 5.5])
+
+        args = (lines, font, max_size, max_width, max_height, line_spacing, min_size)
+        assert fit_font_size(
+            lines,
+            font,
+            max_size,
+            max_width,
+            max_height=max_height,
+            line_spacing=line_spacing,
+            min_size=min_size,
+        ) == _expected(*args), args
+
+
+def test_max_size_below_min_size():
+    assert fit_font_size(["x" * 200], "Helvetica", 3, max_width=10, min_size=4) == 3
+    assert fit_font_size(["x"], "Helvetica", 3, max_width=100, min_size=4) == 3
+
+
+def test_range_not_a_multiple_of_the_step():
+    # 12, 11.5, ..., 4.5 are tried; 4.2 is only used when none of them fit
+    width = pdfmetrics.stringWidth("Hello", "Helvetica", 7.5)
+    assert fit_font_size(["Hello"], "Helvetica", 12, width, min_size=4.2) == 7.5
+    assert fit_font_size(["Hello"], "Helvetica", 12, 1, min_size=4.2) == 4.2
+
+
+def test_no_lines_fit_at_max_size():
+    assert fit_font_size([], "Helvetica", 12, max_width=0, max_height=0) == 12
@@ -0,0 +1,81 @@
+import json
+from pathlib import Path
+
+import pytest
+from pypdf import PdfReader
+from reportlab.lib.pagesizes import A6
+from reportlab.pdfgen import canvas
+
+from print_tools.core.imposition import (
+    PLAN_VERSION,
+    layout_pages,
+    load_plan,
+    make_plan,
+    render_layout_parallel,
+    render_layout_streaming,
+    save_plan,
+)
+from print_tools.utils.layouting.algorithms import GridLayouter
+from print_tools.utils.pages import PageSource, gather_page_refs
+
+
+def _a6_page(path: Path) -> Path:
+    c = canvas.Canvas(str(path), pagesize=A6)
+    c.setFont("Helvetica", 12)
+    for i in range(20):
+        c.drawString(20, 380 - i * 14, f"Line {i}: the quick brown fox")
+    c.save()
+    return path
+
+
+def _forms(path: Path) -> int:
+    """Number of distinct Form XObjects the sheets of `path` draw."""
+    forms = set()
+    for page in PdfReader(path).pages:
+        for ref in page["/Resources"]["/XObject"].values():
+            forms.add(ref.idnum)
+    return len(forms)
+
+
+def _layout(tmp_path: Path, copies: int):
+    page = _a6_page(tmp_path / "a6.pdf")
+    source = PageSource()
+    pages = gather_page_refs([page] * copies, source=source)
+    result = layout_pages(pages, GridLayouter(padding=0, gap=0), paper="A4")
+    return result, pages, source
+
+
+def test_parallel_render_stores_shared_form_once(tmp_path):
+    result, pages, _ = _layout(tmp_path, 16)
+    output = tmp_path / "out.pdf"
+
+    render_layout_parallel(result, pages, output, jobs=2)
+
+    assert len(PdfReader(output).pages) == 4
+    assert _forms(output) == 1
+
+
+def test_streaming_render_stores_shared_form_once(tmp_path):
+    result, pages, source = _layout(tmp_path, 16)
+    output = tmp_path / "out.pdf"
+
+    render_layout_streaming(result, pages, output, chunk_sheets=1, source=source)
+
+    assert len(PdfReader(output).pages) == 4
+    assert _forms(output) == 1
+
+
+def test_saved_plan_records_its_version(tmp_path):
+    _, pages, _ = _layout(tmp_path, 4)
+    path = tmp_path / "plan.json"
+
+    save_plan(make_plan(pages, GridLayouter(), paper="A4"), path)
+
+    data = json.loads(path.read_text())
+    assert data["version"] == PLAN_VERSION
+    assert load_plan(path).pages == pages
+
+    data["version"] = PLAN_VERSION + 1
+    path.write_text(json.dumps(data))
+    with pytest.raises(ValueError, match="Unsupported plan version"):
+        load_plan(path)
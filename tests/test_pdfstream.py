@@ -0,0 +1,206 @@
+import io
+from pathlib import Path
+
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import (
+    ArrayObject,
+    DecodedStreamObject,
+    DictionaryObject,
+    NameObject,
+    NullObject,
+    NumberObject,
+)
+
+from print_tools.utils.pdfstream import StreamingPdfWriter
+from print_tools.utils.selection import parse_page_input
+
+
+def _stream(data: bytes, **entries) -> DecodedStreamObject:
+    stream = DecodedStreamObject()
+    stream.set_data(data)
+    stream.update({NameObject(f"/{k}"): v for k, v in entries.items()})
+    return stream
+
+
+def _sample_pdf() -> bytes:
+    """
+    A page with an image whose colour space is an indirect ICCBased array, and
+    a form whose resources are an indirect dict pointing at an indirect font.
+    """
+    writer = PdfWriter()
+    page = writer.add_blank_page(width=200, height=200)
+    add = writer._add_object
+
+    icc = add(_stream(b"fake icc profile", N=NumberObject(3)))
+    colour_space = add(ArrayObject([NameObject("/ICCBased"), icc]))
+    image = add(
+        _stream(
+            bytes(range(12)),
+            Type=NameObject("/XObject"),
+            Subtype=NameObject("/Image"),
+            Width=NumberObject(2),
+            Height=NumberObject(2),
+            BitsPerComponent=NumberObject(8),
+            ColorSpace=colour_space,
+        )
+    )
+
+    font = add(
+        DictionaryObject(
+            {
+                NameObject("/Type"): NameObject("/Font"),
+                NameObject("/Subtype"): NameObject("/Type1"),
+                NameObject("/BaseFont"): NameObject("/Helvetica"),
+            }
+        )
+    )
+    form_resources = add(
+        DictionaryObject(
+            {NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})}
+        )
+    )
+    form = add(
+        _stream(
+            b"BT /F1 12 Tf (hi) Tj ET",
+            Type=NameObject("/XObject"),
+            Subtype=NameObject("/Form"),
+            BBox=ArrayObject([NumberObject(v) for v in (0, 0, 100, 100)]),
+            Resources=form_resources,
+        )
+    )
+
+    page[NameObject("/Resources")] = DictionaryObject(
+        {
+            NameObject("/XObject"): DictionaryObject(
+                {NameObject("/Im1"): image, NameObject("/Fm1"): form}
+            )
+        }
+    )
+    page[NameObject("/Contents")] = add(
+        _stream(b"q 10 0 0 10 0 0 cm /Im1 Do Q /Fm1 Do")
+    )
+
+    buf = io.BytesIO()
+    writer.write(buf)
+    return buf.getvalue()
+
+
+def _concat(*inputs: bytes, dedupe: bool) -> PdfReader:
+    out = io.BytesIO()
+    with StreamingPdfWriter(out, dedupe=dedupe) as writer:
+        for data in inputs:
+            writer.append(PdfReader(io.BytesIO(data)))
+    out.seek(0)
+    return PdfReader(out)
+
+
+def _xobjects(page) -> dict[str, int]:
+    """Output object number of each XObject of `page`."""
+    return {name: ref.idnum for name, ref in page["/Resources"]["/XObject"].items()}
+
+
+def test_dedupe_shares_objects_with_indirect_references():
+    data = _sample_pdf()
+    reader = _concat(data, data, dedupe=True)
+
+    assert _xobjects(reader.pages[0]) == _xobjects(reader.pages[1])
+
+    image = reader.pages[1]["/Resources"]["/XObject"]["/Im1"].get_object()
+    assert image["/ColorSpace"][0] == "/ICCBased"
+    form = reader.pages[1]["/Resources"]["/XObject"]["/Fm1"].get_object()
+    assert form["/Resources"]["/Font"]["/F1"]["/BaseFont"] == "/Helvetica"
+
+
+def test_dedupe_matches_across_renumbered_inputs():
+    # the same content under different object numbers in the second input
+    data = _sample_pdf()
+    writer = PdfWriter()
+    writer.add_blank_page(width=10, height=10)
+    writer.append(PdfReader(io.BytesIO(data)))
+    shifted = io.BytesIO()
+    writer.write(shifted)
+
+    reader = _concat(data, shifted.getvalue(), dedupe=True)
+    assert _xobjects(reader.pages[0]) == _xobjects(reader.pages[2])
+
+
+def test_without_dedupe_objects_are_copied():
+    data = _sample_pdf()
+    reader = _concat(data, data, dedupe=False)
+
+    first, second = _xobjects(reader.pages[0]), _xobjects(reader.pages[1])
+    assert set(first.values()).isdisjoint(second.values())
+
+
+def test_dedupe_keeps_output_valid():
+    data = _sample_pdf()
+    reader = _concat(data, data, data, dedupe=True)
+
+    assert len(reader.pages) == 3
+    for page in reader.pages:
+        image = page["/Resources"]["/XObject"]["/Im1"].get_object()
+        assert image.get_data() == bytes(range(12))
+
+
+def _linked_pdf(path: Path, count: int) -> Path:
+    """`count` pages, each with a link to the next one (the last to the first)."""
+    writer = PdfWriter()
+    pages = [writer.add_blank_page(width=200, height=200) for _ in range(count)]
+    for i, page in enumerate(pages):
+        page[NameObject("/Contents")] = writer._add_object(
+            _stream(b"0 0 1 rg 10 10 100 100 re f %d 0 0 0 re" % i)
+        )
+        link = DictionaryObject(
+            {
+                NameObject("/Type"): NameObject("/Annot"),
+                NameObject("/Subtype"): NameObject("/Link"),
+                NameObject("/Rect"): ArrayObject([NumberObject(0)] * 4),
+                NameObject("/Dest"): ArrayObject(
+                    [pages[(i + 1) % count].indirect_reference, NameObject("/Fit")]
+                ),
+            }
+        )
+        page[NameObject("/Annots")] = ArrayObject([writer._add_object(link)])
+
+    writer.write(path)
+    return path
+
+
+def _link_targets(reader: PdfReader) -> list:
+    return [
+        annot.get_object()["/Dest"][0]
+        for page in reader.pages
+        for annot in page["/Annots"]
+    ]
+
+
+def test_page_range_does_not_copy_linked_pages(tmp_path):
+    path = _linked_pdf(tmp_path / "linked.pdf", 50)
+
+    out = io.BytesIO()
+    with StreamingPdfWriter(out) as writer:
+        writer.append(parse_page_input(f"{path}[1-2]"))
+    out.seek(0)
+    reader = PdfReader(out)
+
+    assert len(reader.pages) == 2
+    # pages, their contents and links, the page tree and the catalog
+    assert int(reader.trailer["/Size"]) <= 10
+
+    first, second = _link_targets(reader)
+    assert first.idnum == reader.pages[1].indirect_reference.idnum
+    assert isinstance(second, NullObject)
+
+
+def test_whole_document_keeps_links_between_pages(tmp_path):
+    path = _linked_pdf(tmp_path / "linked.pdf", 5)
+
+    out = io.BytesIO()
+    with StreamingPdfWriter(out, dedupe=True) as writer:
+        writer.append(path)
+    out.seek(0)
+    reader = PdfReader(out)
+
+    targets = [ref.idnum for ref in _link_targets(reader)]
+    pages = [page.indirect_reference.idnum for page in reader.pages]
+    assert targets == pages[1:] + pages[:1]
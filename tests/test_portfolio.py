@@ -0,0 +1,32 @@
+import random
+
+from print_tools.utils.layouting.models import Box, Container, ContainerSpec
+from print_tools.utils.layouting.portfolio import PortfolioLayouter
+
+SHEET = ContainerSpec(container=Container(width=595, height=842))
+
+
+def _boxes(count: int) -> list[Box]:
+    rng = random.Random(3)
+    return [
+        Box(width=rng.uniform(20, 200), height=rng.uniform(20, 200))
+        for _ in range(count)
+    ]
+
+
+def test_parallel_search_places_every_box():
+    boxes = _boxes(40)
+
+    result = PortfolioLayouter(time_budget=1.0, jobs=2).perform_layout(SHEET, boxes)
+
+    assert sorted(p.box_index for p in result.iter_placements()) == list(range(40))
+    assert "strategy" in result.custom_fields
+
+
+def test_parallel_search_returns_a_layout_when_budget_is_spent():
+    boxes = _boxes(2000)
+
+    result = PortfolioLayouter(time_budget=0.0, jobs=2).perform_layout(SHEET, boxes)
+
+    assert result.placement_count == len(boxes)
+    assert len(result.used_containers) >= result.custom_fields["sheet_lower_bound"]
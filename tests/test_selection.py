@@ -0,0 +1,153 @@
+import io
+from pathlib import Path
+
+import pytest
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import (
+    ArrayObject,
+    DecodedStreamObject,
+    DictionaryObject,
+    NameObject,
+    NumberObject,
+)
+
+from print_tools.utils.parsing import parse_page_ranges
+from print_tools.utils.selection import PageSelection, page_at, parse_page_input
+
+
+def _box(*values: float) -> ArrayObject:
+    return ArrayObject(NumberObject(v) for v in values)
+
+
+def _nested_tree(count_error: int = 0) -> PdfReader:
+    """
+    Six pages in a tree of depth three, each drawing its own number:
+
+        root (MediaBox 300x300)
+        ├── a (MediaBox 100x200): 0, 1, 2
+        └── b: 3 (MediaBox 50x50), c: 4, 5
+    """
+    writer = PdfWriter()
+    add = writer._add_object
+
+    def node(kids: list, **entries) -> DictionaryObject:
+        return DictionaryObject(
+            {
+                NameObject("/Type"): NameObject("/Pages"),
+                NameObject("/Kids"): ArrayObject(kids),
+                NameObject("/Count"): NumberObject(entries.pop("Count")),
+                **{NameObject(f"/{k}"): v for k, v in entries.items()},
+            }
+        )
+
+    pages = []
+    for i in range(6):
+        content = DecodedStreamObject()
+        content.set_data(b"%% page %d" % i)
+        page = DictionaryObject(
+            {
+                NameObject("/Type"): NameObject("/Page"),
+                NameObject("/Contents"): add(content),
+            }
+        )
+        if i == 3:
+            page[NameObject("/MediaBox")] = _box(0, 0, 50, 50)
+        pages.append(add(page))
+
+    c = add(node(pages[4:], Count=2))
+    b = add(node([pages[3], c], Count=3 + count_error))
+    a = add(node(pages[:3], Count=3, MediaBox=_box(0, 0, 100, 200)))
+
+    root = writer.root_object["/Pages"].get_object()
+    root.update(node([a, b], Count=6, MediaBox=_box(0, 0, 300, 300)))
+    for parent, kids in (
+        (root.indirect_reference, [a, b]),
+        (a, pages[:3]),
+        (b, [pages[3], c]),
+        (c, pages[4:]),
+    ):
+        for kid in kids:
+            kid.get_object()[NameObject("/Parent")] = parent
+
+    buf = io.BytesIO()
+    writer.write(buf)
+    return PdfReader(buf)
+
+
+def _number(page) -> int:
+    return int(page.get_contents().get_data().split()[-1])
+
+
+def test_page_at_descends_nested_tree():
+    reader = _nested_tree()
+
+    pages = [page_at(reader, i) for i in range(6)]
+
+    assert reader.flattened_pages is None
+    assert [_number(page) for page in pages] == list(range(6))
+    assert [tuple(page.mediabox) for page in pages] == [
+        (0, 0, 100, 200),
+        (0, 0, 100, 200),
+        (0, 0, 100, 200),
+        (0, 0, 50, 50),
+        (0, 0, 300, 300),
+        (0, 0, 300, 300),
+    ]
+
+
+def test_page_at_matches_pypdf_when_counts_are_wrong():
+    # b claims a single page: pages 4 and 5 are not found by counting
+    reader = _nested_tree(count_error=-2)
+
+    expected = _nested_tree(count_error=-2).pages
+    for i in range(len(expected)):
+        page = page_at(reader, i)
+        assert _number(page) == _number(expected[i])
+        assert page.mediabox == expected[i].mediabox
+    assert reader.flattened_pages is not None
+
+
+@pytest.mark.parametrize(
+    "text, ranges",
+    [
+        ("100-140", ((100, 140),)),
+        ("7", ((7, 7),)),
+        ("1,5-8", ((1, 1), (5, 8))),
+        ("200-", ((200, None),)),
+        ("-3", ((1, 3),)),
+        ("-", ((1, None),)),
+        (" 2 - 4 , 9 ", ((2, 4), (9, 9))),
+    ],
+)
+def test_parse_page_ranges(text, ranges):
+    assert parse_page_ranges(text) == ranges
+
+
+@pytest.mark.parametrize("text", ["", "0", "5-3", "a-b", "1,,2", "1-2-3"])
+def test_parse_page_ranges_rejects_bad_ranges(text):
+    with pytest.raises(ValueError, match="is not a page range"):
+        parse_page_ranges(text)
+
+
+def test_parse_page_input(tmp_path):
+    book = tmp_path / "book.pdf"
+
+    assert parse_page_input(str(book)) == book
+    assert parse_page_input(f"{book}[1,5-8,200-]") == PageSelection(
+        book, ((1, 1), (5, 8), (200, None))
+    )
+
+
+def test_existing_file_ending_in_brackets_is_a_path(tmp_path):
+    path = tmp_path / "scan[1-2]"
+    path.write_bytes(b"")
+
+    assert parse_page_input(str(path)) == Path(path)
+
+
+def test_selection_beyond_last_page():
+    selection = PageSelection(Path("book.pdf"), ((1, 2), (4, None)))
+
+    assert selection.indices(5) == [0, 1, 3, 4]
+    with pytest.raises(ValueError, match="page 6 cannot be selected"):
+        PageSelection(Path("book.pdf"), ((6, 6),)).indices(5)
@@ -0,0 +1,108 @@
+import json
+from pathlib import Path
+
+import pytest
+from pypdf import PdfReader
+from reportlab.lib.pagesizes import A6
+from reportlab.pdfgen import canvas
+
+from print_tools.core import templating
+from print_tools.core.templating import (
+    SlotFormatError,
+    TextSlot,
+    create_labeled_pdfs,
+    fill_records,
+    format_slots,
+)
+
+
+def _template(path: Path) -> Path:
+    c = canvas.Canvas(str(path), pagesize=A6)
+    c.setFont("Helvetica", 10)
+    c.drawString(20, 20, "template")
+    c.circle(100, 150, 50)
+    c.save()
+    return path
+
+
+def _blocks(path: Path, count: int) -> Path:
+    path.write_text("\n---\n".join(f"Name {i}\nStreet {i}" for i in range(count)))
+    return path
+
+
+def _template_forms(path: Path) -> set[int]:
+    return {
+        page["/Resources"]["/XObject"].raw_get("/PTTemplate").idnum
+        for page in PdfReader(path).pages
+    }
+
+
+def test_single_file_stores_template_once_across_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(templating, "BATCH_PAGES", 3)
+
+    create_labeled_pdfs(
+        _template(tmp_path / "template.pdf"),
+        _blocks(tmp_path / "blocks.txt", 10),
+        tmp_path / "out",
+        blocks_per_file=0,
+    )
+
+    output = tmp_path / "out" / "blocks.pdf"
+    assert len(PdfReader(output).pages) == 10
+    assert len(_template_forms(output)) == 1
+
+
+def test_parallel_single_file_stores_template_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(templating, "BATCH_PAGES", 3)
+
+    create_labeled_pdfs(
+        _template(tmp_path / "template.pdf"),
+        _blocks(tmp_path / "blocks.txt", 10),
+        tmp_path / "out",
+        blocks_per_file=0,
+        jobs=2,
+    )
+
+    output = tmp_path / "out" / "blocks.pdf"
+    assert len(PdfReader(output).pages) == 10
+    assert len(_template_forms(output)) == 1
+
+
+def test_missing_fields_are_empty_with_any_format_spec():
+    slots = [TextSlot.parse("0,0={name:>6}|{price:.2f}|{qty:d}")]
+
+    assert format_slots(slots, {"name": "A", "qty": None}, 1) == ["     A||"]
+
+
+def test_slot_with_positional_field_is_rejected():
+    with pytest.raises(ValueError, match="positional"):
+        TextSlot.parse("0,0={0}")
+
+
+def test_format_spec_on_csv_strings_fails_before_writing(tmp_path):
+    records = tmp_path / "records.csv"
+    records.write_text("name,price\nA,1.5\n")
+    output_dir = tmp_path / "out"
+
+    with pytest.raises(SlotFormatError, match="record 1"):
+        fill_records(
+            _template(tmp_path / "template.pdf"),
+            records,
+            output_dir,
+            [TextSlot.parse("0,0={price:.2f}")],
+        )
+
+    assert not output_dir.exists()
+
+
+def test_format_error_names_the_record(tmp_path):
+    records = tmp_path / "records.jsonl"
+    records.write_text("\n".join(json.dumps({"price": p}) for p in (1.5, 2, "n/a", 3)))
+
+    with pytest.raises(SlotFormatError, match="record 3"):
+        fill_records(
+            _template(tmp_path / "template.pdf"),
+            records,
+            tmp_path / "out",
+            [TextSlot.parse("0,0={price:.2f}")],
+        )